@@ -6,6 +6,7 @@ Uses Google ADK (Agent Development Kit) framework with system instructions and t
 """
 
 import os
+import sys
 import asyncio
 from pathlib import Path
 from google.adk import Agent
@@ -80,6 +81,27 @@ def create_assistant():
     return agent, InMemoryRunner(agent=agent, app_name="setup_assistant")
 
 
+# Built once and written in a single call rather than one print per line
+_WELCOME_BANNER = "\n".join(
+    [
+        "",
+        "=" * 60,
+        "🤖 Agent Evaluation Setup Assistant",
+        "=" * 60,
+        "",
+        "Type 'exit', 'quit', or 'q' to end.",
+        "",
+        "Assistant: Hi! I help with Agent Evaluation SDK setup and questions.",
+        "          What would you like help with?",
+        "          1. Full setup (SDK + infrastructure)",
+        "          2. Evaluation script only",
+        "          3. Questions or troubleshooting",
+        "",
+        "",
+    ]
+)
+
+
 async def run():
     """Run assistant"""
     agent, runner = create_assistant()
@@ -87,15 +109,7 @@ async def run():
         app_name="setup_assistant", user_id="user"
     )
 
-    print("\n" + "=" * 60)
-    print("🤖 Agent Evaluation Setup Assistant")
-    print("=" * 60)
-    print("\nType 'exit', 'quit', or 'q' to end.\n")
-    print("Assistant: Hi! I help with Agent Evaluation SDK setup and questions.")
-    print("          What would you like help with?")
-    print("          1. Full setup (SDK + infrastructure)")
-    print("          2. Evaluation script only")
-    print("          3. Questions or troubleshooting\n")
+    sys.stdout.write(_WELCOME_BANNER)
 
     while True:
         try:
@@ -3,6 +3,9 @@
 import yaml
 from pathlib import Path
 
+# libyaml-backed loader when available, same safety as yaml.safe_load
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def _find_repo_root(repo_path: Path) -> Path:
     """Find the repository root by looking for sdk/ and terraform/ directories."""
@@ -59,8 +62,8 @@ def copy_config_template_tool(
             }
 
         # Read template
-        with open(template_path) as f:
-            config = yaml.safe_load(f)
+        with open(template_path, "rb") as f:
+            config = yaml.load(f, Loader=Loader)
 
         # Customize based on user preferences
         config["logging"]["enabled"] = enable_logging
@@ -126,8 +129,8 @@ def add_evaluation_config_tool(config_path: str) -> dict:
             }
 
         # Read existing config
-        with open(config_file) as f:
-            config = yaml.safe_load(f) or {}
+        with open(config_file, "rb") as f:
+            config = yaml.load(f, Loader=Loader) or {}
 
         # Check if evaluation sections already exist
         if "genai_eval" in config or "regression" in config:
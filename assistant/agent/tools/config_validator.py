@@ -4,6 +4,9 @@ Simple Config Validator
 
 import yaml
 
+# libyaml-backed loader when available, same safety as yaml.safe_load
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def validate_config_tool(config_content: str, config_type: str):
     """
@@ -15,12 +18,21 @@ def validate_config_tool(config_content: str, config_type: str):
     issues = []
     suggestions = []
 
-    # Parse YAML
+    # Parse YAML into a node tree only; values are built just for the
+    # sections we actually inspect
     try:
-        config = yaml.safe_load(config_content)
+        root = yaml.compose(config_content, Loader=Loader)
     except yaml.YAMLError as e:
         return {"valid": False, "issues": [f"Invalid YAML: {e}"], "suggestions": []}
 
+    sections = {}
+    if isinstance(root, yaml.MappingNode):
+        sections = {
+            key.value: value
+            for key, value in root.value
+            if isinstance(key, yaml.ScalarNode)
+        }
+
     if config_type == "eval_config":
         # Check required sections
         required = [
@@ -32,11 +44,17 @@ def validate_config_tool(config_content: str, config_type: str):
             "regression",
         ]
         for section in required:
-            if section not in config:
+            if section not in sections:
                 issues.append(f"Missing section: {section}")
 
         # Check auto_collect warning
-        if config.get("dataset", {}).get("auto_collect"):
+        dataset = {}
+        if "dataset" in sections:
+            try:
+                dataset = Loader("").construct_document(sections["dataset"])
+            except yaml.YAMLError as e:
+                return {"valid": False, "issues": [f"Invalid YAML: {e}"], "suggestions": []}
+        if isinstance(dataset, dict) and dataset.get("auto_collect"):
             suggestions.append(
                 "Remember to set auto_collect: false after collecting data"
             )
@@ -85,7 +85,6 @@ CUSTOMIZE THIS SCRIPT:
 import sys
 import uuid
 import yaml
-import asyncio
 from datetime import datetime, timezone
 from google.genai import types
 
@@ -97,7 +96,7 @@ from google.genai import types
 from {module_name} import create_adk_agent
 
 # Import evaluation SDK
-from agent_evaluation_sdk import RegressionTester, GenAIEvaluator
+from agent_evaluation_sdk import EvaluationConfig, RegressionTester, aio, get_evaluator
 
 
 async def main():
@@ -114,8 +113,7 @@ async def main():
     with open("agent_config.yaml") as f:
         agent_config = yaml.safe_load(f)
     
-    with open("eval_config.yaml") as f:
-        eval_config = yaml.safe_load(f)
+    eval_config = EvaluationConfig.from_yaml("eval_config.yaml")
 
     # TODO: Customize this to match your agent creation pattern
     # Your function should return: (agent, runner, config, wrapper)
@@ -147,8 +145,8 @@ async def main():
 
     # Fetch test cases
     test_cases = tester.fetch_test_cases(
-        only_reviewed=eval_config.get('regression', {{}}).get('only_reviewed', True),
-        limit=eval_config.get('regression', {{}}).get('test_limit')
+        only_reviewed=eval_config.regression.only_reviewed,
+        limit=eval_config.regression.test_limit
     )
     
     if not test_cases:
@@ -251,12 +249,12 @@ async def main():
     
     # Evaluate
     print("📈 Evaluating responses...")
-    evaluator = GenAIEvaluator(project_id=config["project_id"])
+    evaluator = get_evaluator(config["project_id"])
     eval_results = evaluator._evaluate(
         dataset=results,
-        metrics=eval_config.get('genai_eval', {{}}).get('metrics', ['bleu', 'rouge']),
-        criteria=eval_config.get('genai_eval', {{}}).get('criteria', []),
-        thresholds=eval_config.get('genai_eval', {{}}).get('thresholds', {{}}),
+        metrics=eval_config.genai_eval.metrics,
+        criteria=eval_config.genai_eval.criteria,
+        thresholds=eval_config.genai_eval.thresholds,
     )
     
     # Save metrics
@@ -278,7 +276,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    aio.run(main())
 '''
 
 
@@ -312,7 +310,7 @@ from datetime import datetime
 from {module_name} import YOUR_AGENT_FUNCTION_OR_CLASS
 
 # Import evaluation SDK
-from agent_evaluation_sdk import RegressionTester
+from agent_evaluation_sdk import EvaluationConfig, RegressionTester
 
 
 def get_agent():
@@ -362,8 +360,7 @@ def main():
     with open("agent_config.yaml") as f:
         agent_config = yaml.safe_load(f)
     
-    with open("eval_config.yaml") as f:
-        eval_config = yaml.safe_load(f)
+    eval_config = EvaluationConfig.from_yaml("eval_config.yaml")
 
     # Create your agent
     print("🤖 Initializing agent...")
@@ -397,11 +394,12 @@ def main():
     results = tester.run_full_test(
         agent=agent,
         test_run_name=f"test_{{test_run_timestamp}}",
-        only_reviewed=eval_config.get('regression', {{}}).get('only_reviewed', True),
-        limit=eval_config.get('regression', {{}}).get('test_limit'),
-        metrics=eval_config.get('genai_eval', {{}}).get('metrics', ['bleu', 'rouge']),
-        criteria=eval_config.get('genai_eval', {{}}).get('criteria', []),
-        thresholds=eval_config.get('genai_eval', {{}}).get('thresholds', {{}}),
+        only_reviewed=eval_config.regression.only_reviewed,
+        limit=eval_config.regression.test_limit,
+        metrics=eval_config.genai_eval.metrics,
+        criteria=eval_config.genai_eval.criteria,
+        thresholds=eval_config.genai_eval.thresholds,
+        max_concurrency=eval_config.regression.max_concurrency,
     )
 
     if "error" not in results:
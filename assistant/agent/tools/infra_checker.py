@@ -2,8 +2,6 @@
 Simple Infrastructure Checker
 """
 
-from google.cloud import bigquery
-
 
 def check_infrastructure_tool(project_id: str, agent_name: str):
     """
@@ -16,26 +14,28 @@ def check_infrastructure_tool(project_id: str, agent_name: str):
     errors = []
 
     try:
+        # Imported here so the assistant starts without loading BigQuery
+        from google.cloud import bigquery
+
         client = bigquery.Client(project=project_id)
 
-        # Check dataset
         dataset_id = f"{project_id}.agent_evaluation"
+        table_id = f"{dataset_id}.{agent_name}_eval_dataset"
+
+        # Look up the table first: if it exists the dataset does too, so the
+        # common case needs one round trip instead of two
         try:
-            client.get_dataset(dataset_id)
+            table = client.get_table(table_id)
             details.append(f"BigQuery dataset: {dataset_id}")
-
-            # Check table
-            table_id = f"{dataset_id}.{agent_name}_eval_dataset"
+            details.append(f"Table: {agent_name}_eval_dataset ({table.num_rows} rows)")
+        except Exception:
+            # Check dataset to report which piece is missing
             try:
-                table = client.get_table(table_id)
-                details.append(
-                    f"Table: {agent_name}_eval_dataset ({table.num_rows} rows)"
-                )
-            except Exception:
+                client.get_dataset(dataset_id)
+                details.append(f"BigQuery dataset: {dataset_id}")
                 errors.append(f"Table {agent_name}_eval_dataset not found")
-
-        except Exception:
-            errors.append("BigQuery dataset 'agent_evaluation' not found")
+            except Exception:
+                errors.append("BigQuery dataset 'agent_evaluation' not found")
 
     except Exception as e:
         errors.append(f"Cannot access BigQuery: {e}")
@@ -3,18 +3,18 @@
 import os
 
 import argparse
-import asyncio
+import functools
 import time
 import yaml
 from google.adk import Agent
 from google.adk.runners import InMemoryRunner
 from google.adk.tools import FunctionTool
 from google.genai import types
-from agent_evaluation_sdk import enable_evaluation
+from agent_evaluation_sdk import aio, enable_evaluation
 
 
 # Test queries covering different aspects
-TEST_QUERIES = [
+TEST_QUERIES: tuple[str, ...] = (
     # Simple factual questions (no tools needed)
     "What does HTTP stand for?",
     # Search tool queries
@@ -25,11 +25,17 @@ TEST_QUERIES = [
     "Search for Python tutorials and tell me the top 3 topics",
     # Edge cases
     "Can you help me?",
-]
+)
 
 
+def user_content(text: str) -> types.Content:
+    """Build a user message for runner.run_async."""
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+@functools.cache
 def load_agent_config():
-    """Load agent configuration from YAML file."""
+    """Load agent configuration from YAML file (parsed once per process)."""
     with open("agent_config.yaml") as f:
         return yaml.safe_load(f)
 
@@ -95,14 +101,13 @@ async def run_test_queries():
     print(f"\nTotal queries: {len(TEST_QUERIES)}")
     print("This will generate a dataset for evaluation.\n")
 
-    results = []
-    for i, query in enumerate(TEST_QUERIES, 1):
-        print(f"\n[{i}/{len(TEST_QUERIES)}] Query: {query}")
+    total = len(TEST_QUERIES)
+    results: list = [None] * total
+    for i, query in enumerate(TEST_QUERIES):
+        print(f"\n[{i + 1}/{total}] Query: {query}")
         try:
-            start = time.time()
-            content = types.Content(
-                role="user", parts=[types.Part.from_text(text=query)]
-            )
+            start = time.perf_counter_ns()
+            content = user_content(query)
 
             # Collect response from async generator
             response_text = ""
@@ -114,29 +119,28 @@ async def run_test_queries():
                 if event.content.parts and event.content.parts[0].text:
                     response_text = event.content.parts[0].text
 
-            duration = (time.time() - start) * 1000
+            duration_ns = time.perf_counter_ns() - start
+            duration = duration_ns / 1_000_000
             print(f"Response: {response_text[:100]}...")
             print(f"⏱️  {duration:.0f}ms")
 
-            results.append(
-                {
-                    "query": query,
-                    "response": response_text,
-                    "duration_ms": duration,
-                    "success": True,
-                }
-            )
+            results[i] = {
+                "query": query,
+                "response": response_text,
+                "duration_ms": duration,
+                "duration_ns": duration_ns,
+                "success": True,
+            }
         except Exception as e:
             print(f"❌ Error: {e}")
-            results.append(
-                {
-                    "query": query,
-                    "response": None,
-                    "duration_ms": 0,
-                    "success": False,
-                    "error": str(e),
-                }
-            )
+            results[i] = {
+                "query": query,
+                "response": None,
+                "duration_ms": 0,
+                "duration_ns": 0,
+                "success": False,
+                "error": str(e),
+            }
 
     # Summary
     print("\n" + "=" * 70)
@@ -145,7 +149,7 @@ async def run_test_queries():
     successful = sum(1 for r in results if r["success"])
     failed = len(results) - successful
     avg_duration = (
-        sum(r["duration_ms"] for r in results if r["success"]) / successful
+        sum(r["duration_ns"] for r in results if r["success"]) / successful / 1_000_000
         if successful > 0
         else 0
     )
@@ -185,9 +189,7 @@ async def run_interactive():
             if not user_input:
                 continue
 
-            content = types.Content(
-                role="user", parts=[types.Part.from_text(text=user_input)]
-            )
+            content = user_content(user_input)
 
             # Collect response from async generator
             response_text = ""
@@ -233,4 +235,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    aio.run(main())
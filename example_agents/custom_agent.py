@@ -5,15 +5,22 @@ Replace MyAgent with your actual agent class - it just needs a generate_content(
 """
 
 import argparse
+import asyncio
+import atexit
+import functools
+import io
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import yaml
 from google import genai
 from google.genai import types
-from agent_evaluation_sdk import enable_evaluation
+from agent_evaluation_sdk import RateLimiter, aio, enable_evaluation
 
 
 # Test queries covering different aspects
-TEST_QUERIES = [
+TEST_QUERIES: tuple[str, ...] = (
     # Simple factual questions (no tools needed)
     "Explain what an API is",
     # Search tool queries
@@ -24,20 +31,147 @@ TEST_QUERIES = [
     "What's the difference between a list and a tuple in Python?",
     # Edge cases
     "Thanks for your help",
-]
+)
+
+# Max test queries in flight at once (keeps us under model rate limits)
+MAX_CONCURRENCY = 8
+
+# Coalesce streamed chunks before writing to the terminal: flush after this
+# long or once this many characters are pending, whichever comes first
+STREAM_FLUSH_INTERVAL = 0.016
+STREAM_FLUSH_CHARS = 64
+
+# Max seconds the first interactive query waits for the warm-up request
+WARMUP_JOIN_TIMEOUT = 2.0
+
+
+def extract_text(response):
+    """Return a response's text, falling back to str() for plain responses."""
+    try:
+        text = response.text
+    except AttributeError:
+        return str(response)
+    return text if text is not None else ""
+
+
+SYSTEM_INSTRUCTION = "You are a helpful assistant. Provide concise, clear answers."
 
 
 # Example: Your agent class (replace with your actual agent implementation)
 class MyAgent:
     """Simple agent wrapper - replace with your actual agent implementation."""
 
-    def __init__(self, model, client, tools, tool_functions):
+    def __init__(
+        self, model, client, tools, tool_functions, enable_parallel_tool_execution=False
+    ):
         self.model = model
         self.client = client
         self.tools = tools
         self.tool_functions = tool_functions
-        self.system_instruction = (
-            "You are a helpful assistant. Provide concise, clear answers."
+        self.system_instruction = SYSTEM_INSTRUCTION
+        # Run independent tool calls from one model turn concurrently.
+        # Leave off if your tools depend on each other's side effects.
+        self.enable_parallel_tool_execution = enable_parallel_tool_execution
+        self._tool_executor = None
+
+    # The request config is built once and reused: an identical system
+    # instruction + tool prefix on every call lets Gemini's implicit context
+    # caching kick in. Changing either one marks it for a rebuild.
+    @property
+    def tools(self):
+        return self._tools
+
+    @tools.setter
+    def tools(self, tools):
+        self._tools = tools
+        self._gen_config = None
+
+    @property
+    def system_instruction(self):
+        return self._system_instruction
+
+    @system_instruction.setter
+    def system_instruction(self, system_instruction):
+        self._system_instruction = system_instruction
+        self._gen_config = None
+
+    def _config(self):
+        """Return the shared GenerateContentConfig, rebuilding it if stale."""
+        if self._gen_config is None:
+            self._gen_config = types.GenerateContentConfig(
+                tools=self._tools,
+                system_instruction=self._system_instruction,
+            )
+        return self._gen_config
+
+    def enable_context_cache(self, ttl="3600s"):
+        """Opt in to explicit context caching of the system instruction and tools.
+
+        Explicit caches need a prefix above the model's minimum cacheable token
+        count; if creation fails the agent keeps using implicit caching.
+        """
+        try:
+            cache = self.client.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=self.system_instruction,
+                    tools=self.tools,
+                    ttl=ttl,
+                ),
+            )
+        except Exception as e:
+            print(f"⚠️  Context cache not created, using implicit caching: {e}")
+            return
+        # Cached content already carries the system instruction and tools
+        self._gen_config = types.GenerateContentConfig(cached_content=cache.name)
+
+    def start_warmup(self):
+        """Warm up auth and the model connection in a background thread.
+
+        count_tokens is free and exercises the same credentials and channel as a
+        real request, so the user's first query skips the cold start.
+        """
+
+        def warm():
+            try:
+                self.client.models.count_tokens(model=self.model, contents="warm-up")
+            except Exception:
+                pass  # Best effort: real errors surface on the first query
+
+        thread = threading.Thread(target=warm, name="warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _run_tools(self, calls):
+        """Execute the model's tool calls, in parallel when enabled."""
+        if not self.enable_parallel_tool_execution or len(calls) < 2:
+            return [self.tool_functions[call.name](**dict(call.args)) for call in calls]
+
+        if self._tool_executor is None:
+            self._tool_executor = ThreadPoolExecutor(thread_name_prefix="tool_")
+        # Keep tool traces attached to this interaction when running on pool threads
+        wrapper = getattr(self, "_evaluation_wrapper", None)
+        futures = [
+            self._tool_executor.submit(
+                wrapper.propagate_context(self.tool_functions[call.name])
+                if wrapper
+                else self.tool_functions[call.name],
+                **dict(call.args),
+            )
+            for call in calls
+        ]
+        return [future.result() for future in futures]
+
+    def _function_response(self, calls, results):
+        """Build the tool-results turn sent back to the model."""
+        return types.Content(
+            role="function",
+            parts=[
+                types.Part.from_function_response(
+                    name=call.name, response={"result": result}
+                )
+                for call, result in zip(calls, results)
+            ],
         )
 
     def generate_content(self, prompt):
@@ -45,55 +179,99 @@ class MyAgent:
         response = self.client.models.generate_content(
             model=self.model,
             contents=[prompt],
-            config=types.GenerateContentConfig(
-                tools=self.tools,
-                system_instruction=self.system_instruction,
-            ),
+            config=self._config(),
         )
 
-        # Handle tool calls (your agent's tool handling logic)
+        # Handle tool calls (your agent's tool handling logic). The follow-up keeps
+        # [prompt, model turn, tool results] order so only the suffix differs.
         if response.function_calls:
-            call = response.function_calls[0]
-            result = self.tool_functions[call.name](**dict(call.args))
+            calls = response.function_calls
+            results = self._run_tools(calls)
 
             response = self.client.models.generate_content(
                 model=self.model,
                 contents=[
                     prompt,
                     response.candidates[0].content,
-                    types.Content(
-                        role="function",
-                        parts=[
-                            types.Part.from_function_response(
-                                name=call.name, response={"result": result}
-                            )
-                        ],
-                    ),
+                    self._function_response(calls, results),
                 ],
-                config=types.GenerateContentConfig(
-                    tools=self.tools,
-                    system_instruction=self.system_instruction,
-                ),
+                config=self._config(),
             )
 
         return response
 
+    def stream_content(self, prompt):
+        """Optional streaming method: SDK wraps this and logs the accumulated text."""
+        calls, model_parts = [], []
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model, contents=[prompt], config=self._config()
+        ):
+            if chunk.function_calls:
+                calls.extend(chunk.function_calls)
+                model_parts.extend(chunk.candidates[0].content.parts)
+            else:
+                yield chunk
+
+        if not calls:
+            return
+
+        results = self._run_tools(calls)
+        yield from self.client.models.generate_content_stream(
+            model=self.model,
+            contents=[
+                prompt,
+                types.Content(role="model", parts=model_parts),
+                self._function_response(calls, results),
+            ],
+            config=self._config(),
+        )
+
 
+@functools.cache
 def load_agent_config():
-    """Load agent configuration from YAML file."""
+    """Load agent configuration from YAML file (parsed once per process)."""
     with open("agent_config.yaml") as f:
         return yaml.safe_load(f)
 
 
+# Shared genai clients keyed by (project, location)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(project, location):
+    """Return a shared genai.Client for this project and location.
+
+    Client setup (credential discovery, transport init) is expensive, so agents
+    created in the same process reuse one client.
+    """
+    with _clients_lock:
+        client = _clients.get((project, location))
+        if client is None:
+            client = genai.Client(vertexai=True, project=project, location=location)
+            _clients[(project, location)] = client
+        return client
+
+
+@atexit.register
+def close_clients():
+    """Close cached clients so their connections are released on exit."""
+    with _clients_lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _clients.clear()
+
+
 def create_agent():
     """Create agent with evaluation - minimal integration."""
     # Load configuration
     config = load_agent_config()
 
     # 1. Create your agent (as you normally would)
-    client = genai.Client(
-        vertexai=True, project=config["project_id"], location=config["location"]
-    )
+    client = _get_client(config["project_id"], config["location"])
 
     # Define tools
     tools = [
@@ -129,7 +307,11 @@ def create_agent():
     ]
 
     agent = MyAgent(
-        model=config["model"], client=client, tools=tools, tool_functions={}
+        model=config["model"],
+        client=client,
+        tools=tools,
+        tool_functions={},
+        enable_parallel_tool_execution=True,  # search and calculator are independent
     )
 
     # 2. Enable evaluation (ONE LINE!)
@@ -157,8 +339,8 @@ def create_agent():
     return agent, wrapper
 
 
-def run_test_queries():
-    """Run all test queries and collect responses."""
+async def run_test_queries():
+    """Run all test queries concurrently and collect responses."""
     print("=" * 70)
     print("Running Test Queries")
     print("=" * 70)
@@ -166,45 +348,51 @@ def run_test_queries():
     print("This will generate a dataset for evaluation.\n")
 
     agent, wrapper = create_agent()
-
-    results = []
-    for i, query in enumerate(TEST_QUERIES, 1):
-        print(f"\n[{i}/{len(TEST_QUERIES)}] Query: {query}")
-
-        try:
-            start = time.time()
-            response = agent.generate_content(query)
-            duration = (time.time() - start) * 1000
-
-            response_text = (
-                response.text if hasattr(response, "text") else str(response)
-            )
-            print(f"Response: {response_text[:100]}...")
-            print(f"⏱️  {duration:.0f}ms")
-
-            results.append(
-                {
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    # Token bucket only blocks once the per-minute budget is spent
+    limiter = RateLimiter(rpm=wrapper.config.rate_limit.rpm)
+
+    def generate(query):
+        limiter.acquire()
+        return agent.generate_content(query)
+
+    async def run_query(i, query):
+        async with semaphore:
+            try:
+                start = time.perf_counter_ns()
+                # generate_content is blocking; run it off the event loop
+                response = await asyncio.to_thread(generate, query)
+                duration_ns = time.perf_counter_ns() - start
+                duration = duration_ns / 1_000_000
+
+                response_text = extract_text(response)
+                print(f"\n[{i}/{len(TEST_QUERIES)}] Query: {query}")
+                print(f"Response: {response_text[:100]}...")
+                print(f"⏱️  {duration:.0f}ms")
+
+                return {
                     "query": query,
                     "response": response_text,
                     "duration_ms": duration,
+                    "duration_ns": duration_ns,
                     "success": True,
                 }
-            )
 
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            results.append(
-                {
+            except Exception as e:
+                print(f"\n[{i}/{len(TEST_QUERIES)}] Query: {query}")
+                print(f"❌ Error: {e}")
+                return {
                     "query": query,
                     "response": None,
                     "duration_ms": 0,
+                    "duration_ns": 0,
                     "success": False,
                     "error": str(e),
                 }
-            )
 
-        # Small delay to avoid rate limits
-        time.sleep(1)
+    results = await asyncio.gather(
+        *(run_query(i, query) for i, query in enumerate(TEST_QUERIES, 1))
+    )
 
     # Summary
     print("\n" + "=" * 70)
@@ -213,7 +401,7 @@ def run_test_queries():
     successful = sum(1 for r in results if r["success"])
     failed = len(results) - successful
     avg_duration = (
-        sum(r["duration_ms"] for r in results if r["success"]) / successful
+        sum(r["duration_ns"] for r in results if r["success"]) / successful / 1_000_000
         if successful > 0
         else 0
     )
@@ -237,6 +425,8 @@ def run_test_queries():
 def run_interactive():
     """Run agent in interactive mode."""
     agent, wrapper = create_agent()
+    # Warm up while the user types their first message
+    warmup = agent.start_warmup() if load_agent_config().get("warmup", True) else None
 
     print("Agent is ready! Type 'quit' to exit.\n")
 
@@ -248,8 +438,30 @@ def run_interactive():
             if not user_input:
                 continue
 
-            response = agent.generate_content(user_input)
-            print(f"Agent: {response.text}\n")
+            if warmup:
+                # Don't race the warm-up request on the same connection
+                warmup.join(timeout=WARMUP_JOIN_TIMEOUT)
+                warmup = None
+
+            print("Agent: ", end="", flush=True)
+            buffer = io.StringIO()
+            last_flush = time.monotonic()
+            for chunk in agent.stream_content(user_input):
+                if chunk.text:
+                    buffer.write(chunk.text)
+                now = time.monotonic()
+                if buffer.tell() and (
+                    buffer.tell() >= STREAM_FLUSH_CHARS
+                    or now - last_flush >= STREAM_FLUSH_INTERVAL
+                ):
+                    sys.stdout.write(buffer.getvalue())
+                    sys.stdout.flush()
+                    buffer.seek(0)
+                    buffer.truncate()
+                    last_flush = now
+            buffer.write("\n\n")
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
 
         except KeyboardInterrupt:
             break
@@ -275,7 +487,7 @@ def main():
     args = parser.parse_args()
 
     if args.test:
-        run_test_queries()
+        aio.run(run_test_queries())
     else:
         run_interactive()
 
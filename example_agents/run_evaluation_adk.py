@@ -6,16 +6,14 @@ Runs the ADK agent against the testing dataset and evaluates performance.
 
 import sys
 import uuid
-import yaml
 import asyncio
 from datetime import datetime, timezone
-from google.genai import types
 
 # Import agent creation from adk_agent.py
-from adk_agent import create_adk_agent
+from adk_agent import create_adk_agent, user_content
 
 # Import evaluation SDK
-from agent_evaluation_sdk import RegressionTester, GenAIEvaluator
+from agent_evaluation_sdk import EvaluationConfig, RegressionTester, aio, get_evaluator
 
 
 async def main():
@@ -25,8 +23,8 @@ async def main():
     print()
 
     # Load configuration
-    with open("eval_config.yaml") as f:
-        eval_config = yaml.safe_load(f)
+    # Same parsed config the wrapper loads (cached), with SDK defaults filled in
+    eval_config = EvaluationConfig.from_yaml("eval_config.yaml")
 
     # Create ADK agent
     agent, runner, wrapper, config = create_adk_agent()
@@ -43,13 +41,15 @@ async def main():
     print(f"🔄 Running evaluation test: test_{test_run_timestamp}")
     print()
 
-    # Fetch test cases
-    test_cases = tester.fetch_test_cases(
-        only_reviewed=eval_config.get("regression", {}).get("only_reviewed", True),
-        limit=eval_config.get("regression", {}).get("test_limit"),
+    # Stream test cases so the agent starts on the first page while later ones load.
+    # Rows are pulled in a worker thread since waiting on a page would block the loop.
+    test_cases = tester.iter_test_cases(
+        only_reviewed=eval_config.regression.only_reviewed,
+        limit=eval_config.regression.test_limit,
     )
+    first_case = await asyncio.to_thread(next, test_cases, None)
 
-    if not test_cases:
+    if first_case is None:
         print(
             "❌ No test cases found. Run the agent with --test to collect data first."
         )
@@ -57,7 +57,6 @@ async def main():
         wrapper.shutdown()
         sys.exit(1)
 
-    print(f"📋 Found {len(test_cases)} test cases")
     print()
 
     # Create session for evaluation
@@ -72,17 +71,18 @@ async def main():
     test_timestamp = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
     results = []
-    for i, test_case in enumerate(test_cases, 1):
+    i = 0
+    test_case = first_case
+    while test_case is not None:
+        i += 1
         instruction = test_case["instruction"]
         reference = test_case.get("reference", "")
         reference_trajectory = test_case.get("reference_trajectory")
 
-        print(f"   [{i}/{len(test_cases)}] Testing...")
+        print(f"   [{i}] Testing...")
 
         try:
-            content = types.Content(
-                role="user", parts=[types.Part.from_text(text=instruction)]
-            )
+            content = user_content(instruction)
             response_text = ""
 
             async for event in runner.run_async(
@@ -131,6 +131,8 @@ async def main():
                 }
             )
 
+        test_case = await asyncio.to_thread(next, test_cases, None)
+
     print(f"✅ Completed {len(results)} test runs")
 
     # Save using RegressionTester methods (uses new table naming)
@@ -138,20 +140,25 @@ async def main():
 
     # Evaluate
     print("📈 Evaluating responses...")
-    evaluator = GenAIEvaluator(project_id=config["project_id"])
+    evaluator = get_evaluator(config["project_id"])
     eval_results = evaluator._evaluate(
         dataset=results,
-        metrics=eval_config.get("genai_eval", {}).get("metrics", ["bleu", "rouge"]),
-        criteria=eval_config.get("genai_eval", {}).get("criteria", []),
-        thresholds=eval_config.get("genai_eval", {}).get("thresholds", {}),
+        metrics=eval_config.genai_eval.metrics,
+        criteria=eval_config.genai_eval.criteria,
+        thresholds=eval_config.genai_eval.thresholds,
     )
 
-    # Save metrics
-    tester.save_metrics(test_run_name, eval_results, metrics_table)
-
-    # Cleanup
-    wrapper.flush()
+    # Save metrics while flushing telemetry (independent network I/O), then shut down
+    save_result, flush_result = await asyncio.gather(
+        asyncio.to_thread(tester.save_metrics, test_run_name, eval_results, metrics_table),
+        asyncio.to_thread(wrapper.flush),
+        return_exceptions=True,
+    )
     wrapper.shutdown()
+    if isinstance(flush_result, Exception):
+        print(f"⚠️  Failed to flush telemetry: {flush_result}")
+    if isinstance(save_result, Exception):
+        raise save_result
 
     print("\n✅ Evaluation test complete!")
     print()
@@ -167,4 +174,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    aio.run(main())
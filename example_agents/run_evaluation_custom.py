@@ -5,14 +5,13 @@ Runs the custom agent against the testing dataset and evaluates performance.
 """
 
 import sys
-import yaml
 from datetime import datetime
 
 # Import agent creation from custom_agent.py
-from custom_agent import create_agent
+from custom_agent import create_agent, load_agent_config
 
 # Import evaluation SDK
-from agent_evaluation_sdk import RegressionTester
+from agent_evaluation_sdk import EvaluationConfig, RegressionTester
 
 
 def main():
@@ -22,11 +21,10 @@ def main():
     print()
 
     # Load configuration
-    with open("agent_config.yaml") as f:
-        agent_config = yaml.safe_load(f)
+    agent_config = load_agent_config()
 
-    with open("eval_config.yaml") as f:
-        eval_config = yaml.safe_load(f)
+    # Same parsed config the wrapper loads (cached), with SDK defaults filled in
+    eval_config = EvaluationConfig.from_yaml("eval_config.yaml")
 
     # Create agent
     agent, wrapper = create_agent()
@@ -48,11 +46,12 @@ def main():
     results = tester.run_full_test(
         agent=agent,
         test_run_name=f"test_{test_run_timestamp}",
-        only_reviewed=eval_config.get("regression", {}).get("only_reviewed", True),
-        limit=eval_config.get("regression", {}).get("test_limit"),
-        metrics=eval_config.get("genai_eval", {}).get("metrics", ["bleu", "rouge"]),
-        criteria=eval_config.get("genai_eval", {}).get("criteria", []),
-        thresholds=eval_config.get("genai_eval", {}).get("thresholds", {}),
+        only_reviewed=eval_config.regression.only_reviewed,
+        limit=eval_config.regression.test_limit,
+        metrics=eval_config.genai_eval.metrics,
+        criteria=eval_config.genai_eval.criteria,
+        thresholds=eval_config.genai_eval.thresholds,
+        max_concurrency=eval_config.regression.max_concurrency,
     )
 
     if "error" not in results:
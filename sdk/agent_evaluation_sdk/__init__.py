@@ -2,25 +2,54 @@
 Agent Evaluation SDK.
 """
 
+import importlib
 import shutil
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from agent_evaluation_sdk.config import EvaluationConfig, RegressionConfig
-from agent_evaluation_sdk.core import enable_evaluation
-from agent_evaluation_sdk.evaluation import GenAIEvaluator
-from agent_evaluation_sdk.regression import RegressionTester
+from agent_evaluation_sdk.core import clear_evaluation_cache, enable_evaluation
+from agent_evaluation_sdk.rate_limit import RateLimiter
+
+if TYPE_CHECKING:
+    from agent_evaluation_sdk.evaluation import GenAIEvaluator, get_evaluator
+    from agent_evaluation_sdk.regression import RegressionTester
 
 __version__ = "0.1.0"
 __all__ = [
     "enable_evaluation",
+    "clear_evaluation_cache",
     "EvaluationConfig",
     "RegressionConfig",
     "GenAIEvaluator",
+    "get_evaluator",
     "RegressionTester",
+    "RateLimiter",
     "create_config_template",
 ]
 
 
+# Evaluation/regression pull in Vertex AI; load them on first access only
+_LAZY_IMPORTS = {
+    "GenAIEvaluator": "agent_evaluation_sdk.evaluation",
+    "get_evaluator": "agent_evaluation_sdk.evaluation",
+    "RegressionTester": "agent_evaluation_sdk.regression",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
+
+
 def create_config_template(target_path: str = "eval_config.yaml") -> None:
     """Create a template eval_config.yaml file in the specified location.
 
@@ -0,0 +1,29 @@
+"""
+Event loop helpers for async evaluation paths.
+"""
+
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion, using uvloop when it is installed.
+
+    Drop-in replacement for asyncio.run. Install the "speedups" extra to get the
+    libuv-based loop; otherwise the default asyncio loop is used.
+
+    Args:
+        main: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        return runner.run(main)
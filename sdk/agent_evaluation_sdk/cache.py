@@ -0,0 +1,132 @@
+"""Semantic response cache for agent generate_content calls."""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _lazy_encoder(model_cls: Callable[[str], Any], model_name: str) -> Callable[[str], Any]:
+    """Embed with a sentence-transformers model loaded on first use.
+
+    The model is loaded once, even if several first calls race.
+    """
+    lock = threading.Lock()
+    encode: Optional[Callable[[str], Any]] = None
+
+    def embed(prompt: str) -> Any:
+        nonlocal encode
+        if encode is None:
+            with lock:
+                if encode is None:
+                    encode = model_cls(model_name).encode
+        return encode(prompt)
+
+    return embed
+
+
+class _CacheStore:
+    """Fixed-size embedding matrix with FIFO eviction for one cache namespace."""
+
+    def __init__(self, np: Any, dim: int, max_entries: int):
+        self.vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self.responses: list = [None] * max_entries
+        self.size = 0
+        self.next_slot = 0
+
+
+class SemanticCache:
+    """In-process cache that reuses responses for semantically similar prompts.
+
+    Prompts are embedded locally with sentence-transformers and compared by cosine
+    similarity against previously answered prompts. Entries are namespaced by the
+    agent's system instruction so different agents never share responses.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+        embedding_model: str = "all-MiniLM-L6-v2",
+        embed_fn: Optional[Callable[[str], Any]] = None,
+    ):
+        """Initialize semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Max cached responses per namespace (oldest evicted first)
+            embedding_model: sentence-transformers model used to embed prompts
+            embed_fn: Optional custom embedding function (prompt -> vector)
+        """
+        # Resolved here so a missing extra fails at enable_evaluation, not on an agent call
+        try:
+            import numpy as np
+
+            if embed_fn is None:
+                from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "Semantic cache requires optional dependencies. "
+                "Install with: pip install 'agent-evaluation-sdk[cache]'"
+            ) from e
+
+        self._np = np
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        self._embed_fn: Callable[[str], Any] = (
+            embed_fn
+            if embed_fn is not None
+            else _lazy_encoder(SentenceTransformer, embedding_model)
+        )
+        self._stores: Dict[Any, _CacheStore] = {}
+        self._lock = threading.Lock()
+
+    def _embed(self, prompt: str):
+        np = self._np
+        vector = np.asarray(self._embed_fn(prompt), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, prompt: str, namespace: Any = None) -> Tuple[Any, Any]:
+        """Find a cached response for a prompt.
+
+        Args:
+            prompt: User prompt
+            namespace: Cache partition (e.g. system instruction hash)
+
+        Returns:
+            Tuple of (cached response or None, prompt embedding to pass to add())
+        """
+        vector = self._embed(prompt)
+        with self._lock:
+            store = self._stores.get(namespace)
+            if store is None or store.size == 0:
+                return None, vector
+            scores = store.vectors[: store.size] @ vector
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                return store.responses[best], vector
+        return None, vector
+
+    def add(self, vector: Any, response: Any, namespace: Any = None) -> None:
+        """Store a response under a prompt embedding returned by lookup().
+
+        Args:
+            vector: Prompt embedding
+            response: Agent response to cache
+            namespace: Cache partition (e.g. system instruction hash)
+        """
+        with self._lock:
+            store = self._stores.get(namespace)
+            if store is None:
+                store = _CacheStore(self._np, vector.shape[0], self.max_entries)
+                self._stores[namespace] = store
+            slot = store.next_slot
+            store.vectors[slot] = vector
+            store.responses[slot] = response
+            store.next_slot = (slot + 1) % self.max_entries
+            store.size = min(store.size + 1, self.max_entries)
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._stores.clear()
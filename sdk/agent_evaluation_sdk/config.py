@@ -2,14 +2,52 @@
 Configuration management for agent evaluation.
 """
 
+import copy
+import functools
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Type, TypeVar
 
 import yaml
 
+# libyaml-backed loader when available (several times faster than pure Python)
+_YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-@dataclass
+
+def _load_yaml(path: Path) -> Dict[str, Any]:
+    """Parse a YAML file, reusing the previous result while the file is unchanged."""
+    st = os.stat(path)
+    # Device + inode pin the file (relative paths stay correct across chdir);
+    # mtime and size change on every edit and invalidate the entry
+    return _load_yaml_cached(os.fspath(path), st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_yaml_cached(path: str, dev: int, ino: int, mtime_ns: int, size: int) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=_YAMLLoader) or {}
+
+
+_T = TypeVar("_T")
+
+
+def _from_dict(cls: Type[_T], section: Dict[str, Any]) -> _T:
+    """Build a config section from the cached YAML dict.
+
+    The dict is shared through the parse cache, so list/dict values are copied
+    (callers may mutate their config); scalars are passed through as-is, which is
+    much cheaper than deep-copying the whole document.
+    """
+    return cls(
+        **{
+            key: copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+            for key, value in section.items()
+        }
+    )
+
+
+@dataclass(slots=True)
 class LoggingConfig:
     """Configuration for Cloud Logging."""
 
@@ -18,21 +56,22 @@ class LoggingConfig:
     include_trajectories: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class TracingConfig:
     """Configuration for Cloud Trace."""
 
     enabled: bool = True
+    sample_rate: float = 1.0  # Fraction of agent calls traced (0-1)
 
 
-@dataclass
+@dataclass(slots=True)
 class MetricsConfig:
     """Configuration for Cloud Monitoring."""
 
     enabled: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class DatasetConfig:
     """Configuration for dataset collection."""
 
@@ -40,10 +79,33 @@ class DatasetConfig:
     storage_location: Optional[str] = (
         None  # BigQuery table for storing collected interactions (None = auto-created table)
     )
-    buffer_size: int = 10  # Number of interactions to buffer before writing to BigQuery
+    buffer_size: Optional[int] = (
+        10  # Number of interactions to buffer before writing to BigQuery (None = by bytes only)
+    )
+    buffer_bytes: int = 1_048_576  # Also write once buffered text reaches this many bytes
+    flush_interval: Optional[float] = (
+        30.0  # Seconds of inactivity before a partial buffer is written (0/None = never)
+    )
+
+
+@dataclass(slots=True)
+class CacheConfig:
+    """Configuration for the semantic response cache."""
+
+    enabled: bool = False  # Requires the optional "cache" extra
+    threshold: float = 0.92  # Minimum cosine similarity for a cache hit
+    max_entries: int = 1000  # Max cached responses per system instruction
+    embedding_model: str = "all-MiniLM-L6-v2"  # sentence-transformers model for prompts
+
+
+@dataclass(slots=True)
+class RateLimitConfig:
+    """Configuration for client-side request pacing."""
+
+    rpm: int = 60  # Requests per minute allowed by the model quota
 
 
-@dataclass
+@dataclass(slots=True)
 class GenAIEvalConfig:
     """Configuration for Gen AI Evaluation Service."""
 
@@ -63,7 +125,7 @@ class GenAIEvalConfig:
     )  # Optional score thresholds for pass/fail (0-1 scale)
 
 
-@dataclass
+@dataclass(slots=True)
 class RegressionConfig:
     """Configuration for regression testing."""
 
@@ -72,9 +134,10 @@ class RegressionConfig:
     dataset_table: Optional[str] = (
         None  # Read from a custom BigQuery table for test cases (None = use default naming)
     )
+    max_concurrency: int = 1  # Test cases run in parallel (raise only if the agent is thread-safe)
 
 
-@dataclass
+@dataclass(slots=True)
 class EvaluationConfig:
     """Main configuration for agent evaluation."""
 
@@ -86,22 +149,27 @@ class EvaluationConfig:
     dataset: DatasetConfig = field(default_factory=DatasetConfig)
     genai_eval: GenAIEvalConfig = field(default_factory=GenAIEvalConfig)
     regression: RegressionConfig = field(default_factory=RegressionConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    rate_limit: RateLimitConfig = field(default_factory=RateLimitConfig)
+    verbose: bool = True  # Print the enabled features when a wrapper is created
 
     @classmethod
     def from_yaml(cls, path: Path) -> "EvaluationConfig":
         """Load configuration from YAML file."""
-        with open(path) as f:
-            data = yaml.safe_load(f)
+        data = _load_yaml(path)
 
         return cls(
             project_id=data.get("project_id", ""),
             agent_name=data.get("agent_name", ""),
-            logging=LoggingConfig(**data.get("logging", {})),
-            tracing=TracingConfig(**data.get("tracing", {})),
-            metrics=MetricsConfig(**data.get("metrics", {})),
-            dataset=DatasetConfig(**data.get("dataset", {})),
-            genai_eval=GenAIEvalConfig(**data.get("genai_eval", {})),
-            regression=RegressionConfig(**data.get("regression", {})),
+            logging=_from_dict(LoggingConfig, data.get("logging", {})),
+            tracing=_from_dict(TracingConfig, data.get("tracing", {})),
+            metrics=_from_dict(MetricsConfig, data.get("metrics", {})),
+            dataset=_from_dict(DatasetConfig, data.get("dataset", {})),
+            genai_eval=_from_dict(GenAIEvalConfig, data.get("genai_eval", {})),
+            regression=_from_dict(RegressionConfig, data.get("regression", {})),
+            cache=_from_dict(CacheConfig, data.get("cache", {})),
+            rate_limit=_from_dict(RateLimitConfig, data.get("rate_limit", {})),
+            verbose=data.get("verbose", True),
         )
 
     @classmethod
@@ -1,22 +1,316 @@
 """Core evaluation wrapper for agents with automatic instrumentation."""
 
-import asyncio
-import atexit
+import contextvars
 import functools
 import inspect
+import math
+import operator
+import os
+import queue
+import random
+import sys
 import threading
 import time
-import uuid
-from concurrent.futures import ThreadPoolExecutor
+import weakref
 from pathlib import Path
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Optional, Tuple
 
+from agent_evaluation_sdk.cache import SemanticCache
 from agent_evaluation_sdk.config import EvaluationConfig
 from agent_evaluation_sdk.dataset import DatasetCollector
+from agent_evaluation_sdk.diagnostics import warn
+from agent_evaluation_sdk.ids import next_id as _next_id
 from agent_evaluation_sdk.logging import CloudLogger
 from agent_evaluation_sdk.metrics import CloudMetrics
 from agent_evaluation_sdk.tracing import CloudTracer
 
+_STOP = object()  # Emitter shutdown sentinel
+_MISSING = object()  # getattr default for attributes that may legitimately be None
+_NO_SPAN_ATTRIBUTES: Dict[str, Any] = {}  # Shared; CloudTracer never mutates attributes
+_EMPTY_METADATA: Dict[str, Any] = {}  # Shared; sinks only read interaction metadata
+_EMIT_QUEUE_SIZE = 10_000  # Max observability jobs waiting for the emitter thread
+_EMIT_BATCH_SIZE = 100  # Jobs drained per pass when the dataset buffer is sized by bytes
+_EXIT_FLUSH_TIMEOUT = 2.0  # Seconds per step when flushing at exit / garbage collection
+
+# Cap on distinct response types remembered (mocks create a new type per instance)
+_EXTRACTOR_CACHE_SIZE = 64
+
+_TRACE_SAMPLE_SCALE = 1 << 32  # Trace sample thresholds are compared to getrandbits(32)
+
+# Agent entry points wrapped by EvaluationWrapper, in wrapping order
+_AGENT_METHODS = ("generate_content", "stream_content", "run_async", "run", "invoke")
+
+# (usage_metadata attribute, metadata key) pairs copied into interaction metadata
+_USAGE_FIELDS = (
+    ("prompt_token_count", "input_tokens"),
+    ("candidates_token_count", "output_tokens"),
+    ("total_token_count", "total_tokens"),
+)
+
+# (trace_id, span_id, tool_spans) of the agent call running in this context. A
+# ContextVar rather than a thread-local so concurrent asyncio tasks don't share it,
+# and so an agent called from inside another agent's call joins the outer trace as a
+# child span. tool_spans collects (tool_name, start, end, error) from tool_trace; they
+# are exported with the call's own spans instead of being queued one job per tool.
+_trace_context: contextvars.ContextVar[Optional[Tuple[str, str, list]]] = contextvars.ContextVar(
+    "agent_evaluation_trace_context", default=None
+)
+# Tool calls recorded by tool_trace for the agent call running in this context
+_tool_calls: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar(
+    "agent_evaluation_tool_calls", default=None
+)
+# Trajectory of the last agent call that finished in this context (get_last_trajectory)
+_last_trajectory: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar(
+    "agent_evaluation_last_trajectory", default=None
+)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _fixed_attributes(cls: type) -> Optional[frozenset]:
+    """Attributes every instance of ``cls`` is guaranteed to have.
+
+    Returns None when instances can carry arbitrary attributes, in which case the
+    type alone does not determine which extraction path applies.
+    """
+    fields = getattr(cls, "model_fields", None)
+    if not isinstance(fields, dict):
+        return None
+    model_config = getattr(cls, "model_config", None) or {}
+    if model_config.get("extra") == "allow":
+        return None
+    properties = {name for name in dir(cls) if isinstance(getattr(cls, name, None), property)}
+    return frozenset(fields) | properties
+
+
+def _open_trace(trace_all: bool, trace_threshold: int) -> Tuple[Any, Any, Any, Any, Any]:
+    """Start the span for an agent call and make it current.
+
+    Returns (trace_id, span_id, outer_span_id, tool_spans, token); all None when the
+    call is not sampled. A call nested in a traced call always joins that trace.
+    """
+    outer = _trace_context.get()
+    if outer is not None:
+        trace_id, outer_span_id, _ = outer
+    elif trace_all or random.getrandbits(32) < trace_threshold:
+        trace_id, outer_span_id = _next_id(), None
+    else:
+        return None, None, None, None, None
+    span_id = _next_id()[:16]
+    tool_spans: list = []
+    token = _trace_context.set((trace_id, span_id, tool_spans))
+    return trace_id, span_id, outer_span_id, tool_spans, token
+
+
+def _restore(var: contextvars.ContextVar, token: contextvars.Token) -> None:
+    """Undo a ContextVar.set made at the start of an agent call."""
+    try:
+        var.reset(token)
+    except ValueError:
+        # A generator finalized from another context; the call's own context is gone
+        pass
+
+
+def _tool_span(
+    trace_id: str,
+    parent_span_id: str,
+    tool_name: str,
+    start: float,
+    end: float,
+    error: Optional[BaseException],
+) -> tuple:
+    """_send_span arguments for a tool call recorded by tool_trace."""
+    attrs = (
+        {
+            "error": True,
+            "error.type": type(error).__name__,
+            "error.message": str(error)[:256],
+        }
+        if error
+        else _NO_SPAN_ATTRIBUTES
+    )
+    return (trace_id, _next_id()[:16], f"tool.{tool_name}", start, end, attrs, parent_span_id)
+
+
+def _no_metadata(response: Any) -> Dict[str, Any]:
+    return _EMPTY_METADATA
+
+
+def _no_token_usage(response: Any) -> Tuple[Optional[int], Optional[int]]:
+    return None, None
+
+
+def _parts_text(parts: Any) -> str:
+    """Join the text of all parts that carry any (one attribute read per part)."""
+    return " ".join([text for part in parts if (text := getattr(part, "text", None))])
+
+
+def _content_output(content: Any) -> str:
+    parts = getattr(content, "parts", None)
+    if parts:
+        text = _parts_text(parts)
+        if text:
+            return text
+    if isinstance(content, str):
+        return content
+    return getattr(content, "text", "")
+
+
+def _candidates_output(response: Any) -> Optional[str]:
+    """Text of the first candidate, or None if there is none to read."""
+    if not response.candidates:
+        return None
+    content = getattr(response.candidates[0], "content", _MISSING)
+    if content is _MISSING:
+        return None
+    parts = getattr(content, "parts", _MISSING)
+    if parts is not _MISSING:
+        return _parts_text(parts or ())
+    return getattr(content, "text", "")
+
+
+def _dict_output(response: dict) -> str:
+    for key in ["output", "response", "text", "content", "message"]:
+        if key in response:
+            return str(response[key])
+    return str(response)
+
+
+def _env_number(name: str, default: Any, cast: Callable[[str], Any] = float) -> Any:
+    """Read a numeric setting from the environment, warning and using default if malformed."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        number = cast(value)
+        if not math.isfinite(number):
+            raise ValueError(value)
+    except ValueError:
+        warn("Ignoring invalid %s=%r; using %s", name, value, default)
+        return default
+    return number
+
+
+def _enabled_label(enabled: bool) -> str:
+    return "Enabled" if enabled else "Disabled"
+
+
+def _named_like(wrapped: Callable, original: Callable) -> Callable:
+    """Give a method wrapper the original's name and docstring.
+
+    Lighter than functools.wraps (no __wrapped__ or __dict__ copy); agent methods
+    aren't signature-introspected the way ADK tools are, so tools keep wraps.
+    """
+    wrapped.__name__ = getattr(original, "__name__", "wrapped")
+    wrapped.__qualname__ = getattr(original, "__qualname__", "wrapped")
+    wrapped.__doc__ = getattr(original, "__doc__", None)
+    return wrapped
+
+
+def _cache_add(cache: SemanticCache, vector: Any, response: Any, namespace: Any) -> None:
+    """Store a response in the semantic cache; a cache failure never fails the agent call."""
+    try:
+        cache.add(vector, response, namespace)
+    except Exception as e:
+        warn("Failed to cache response: %s", e)
+
+
+def _emit_loop(
+    emit_queue: queue.Queue,
+    batch_size: int,
+    logger: Any,
+    log_batch_size: int,
+    log_batch_delay: float,
+) -> None:
+    """Run queued sink jobs on the emitter thread.
+
+    Each interaction arrives as a single job carrying its log entry and its trace,
+    metrics and dataset sends, which run back to back. Interaction logs are held
+    and written together once log_batch_size have accumulated or the oldest has
+    waited log_batch_delay seconds, whichever comes first. Module-level (not a
+    method) so the thread doesn't keep its wrapper alive.
+    """
+    logs: list = []
+    deadline = None  # When the pending logs must be written
+    while True:
+        try:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            items = [emit_queue.get(timeout=wait)]
+        except queue.Empty:
+            _write_logs(logger, logs)
+            logs, deadline = [], None
+            continue
+        _drain(emit_queue, items, batch_size)
+
+        stop = False
+        for item in items:
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                # Flush marker: everything queued before it has been handled
+                _write_logs(logger, logs)
+                logs, deadline = [], None
+                item.set()
+            else:
+                log_entry, sends = item
+                for send, send_args in sends:
+                    send(*send_args)  # Each _send_* helper reports its own failures
+                if log_entry is not None:
+                    if not logs:
+                        deadline = time.monotonic() + log_batch_delay
+                    logs.append(log_entry)
+                    if len(logs) >= log_batch_size:
+                        _write_logs(logger, logs)
+                        logs, deadline = [], None
+
+        if stop:
+            _write_logs(logger, logs)
+            return
+        if deadline is not None and time.monotonic() >= deadline:
+            _write_logs(logger, logs)
+            logs, deadline = [], None
+
+
+def _drain(emit_queue: queue.Queue, items: list, limit: int) -> None:
+    """Move queued jobs into items, up to limit in total, without blocking."""
+    get_nowait = emit_queue.get_nowait
+    while len(items) < limit:
+        try:
+            items.append(get_nowait())
+        except queue.Empty:
+            return
+
+
+def _write_logs(logger: Any, logs: list) -> None:
+    if not logs:
+        return
+    try:
+        logger.log_interactions(logs)
+    except Exception as e:
+        warn("Failed to send logs: %s", e)
+
+
+def _close_sinks(
+    emit_queue: queue.Queue,
+    emit_thread: threading.Thread,
+    tracer: Any,
+    dataset_collector: Any,
+    timeout: float,
+) -> None:
+    """Drain the emitter and flush every sink, waiting at most timeout seconds per step."""
+    try:
+        if emit_thread.is_alive() and emit_thread is not threading.current_thread():
+            emit_queue.put(_STOP, timeout=timeout)
+            emit_thread.join(timeout)
+        if tracer:
+            tracer.shutdown(timeout)
+        if dataset_collector:
+            dataset_collector.shutdown(timeout)
+    except Exception:
+        pass
+
 
 class EvaluationWrapper:
     """Wraps ADK agents with evaluation capabilities. Supports all ADK methods automatically."""
@@ -41,34 +335,110 @@ class EvaluationWrapper:
                 config.agent_name,
                 config.dataset.storage_location,
                 config.dataset.buffer_size,
+                config.dataset.buffer_bytes,
+                config.dataset.flush_interval,
             )
             if config.dataset.auto_collect
             else None
         )
+        self.cache = (
+            SemanticCache(
+                config.cache.threshold,
+                config.cache.max_entries,
+                config.cache.embedding_model,
+            )
+            if config.cache.enabled
+            else None
+        )
 
-        self._trace_context = threading.local()
-        max_workers = getattr(config, "executor_workers", 4)
-        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eval_bg_")
         self._shutdown_called = False
         self._original_methods: Dict[str, Callable] = {}
-        self._tool_traces = threading.local()  # Track tool calls for trajectories per thread
-        self._last_trajectory = None  # Store last captured trajectory for synchronous access
-        atexit.register(self._shutdown)
+        self._output_extractor_cache: Dict[type, Callable] = {}
+        self._metadata_extractor_cache: Dict[type, Callable] = {}
+        self._token_usage_extractor_cache: Dict[type, Callable] = {}
+
+        # Resolved once so the per-call wrappers don't walk the config tree
+        self._track_trajectories = config.logging.include_trajectories
+        self._do_log = self.logger is not None and self._track_trajectories
+        self._do_metrics = self.metrics is not None
+        self._do_collect = self.dataset_collector is not None
+        # Head sampling: a call is traced when a random 32-bit draw falls below the threshold.
+        # AE_TRACE_SAMPLE_RATE overrides tracing.sample_rate from the config.
+        sample_rate = _env_number("AE_TRACE_SAMPLE_RATE", config.tracing.sample_rate)
+        if not 0.0 <= sample_rate <= 1.0:
+            warn("Trace sample rate %s is outside [0, 1]; clamping it", sample_rate)
+            sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self._trace_threshold = int(sample_rate * _TRACE_SAMPLE_SCALE)
+        # A zero sample rate never starts a trace, so it counts as tracing disabled
+        self._do_trace = self.tracer is not None and self._trace_threshold > 0
+        self._fast_path = not (
+            self._do_trace or self._do_metrics or self._do_collect or self._track_trajectories
+        )
+
+        # Full metadata only feeds logs and dataset rows; metrics just need token counts
+        if self._do_log or self._do_collect:
+            self._response_metadata = self._extract_metadata
+        elif self._do_metrics:
+            self._response_metadata = self._token_metadata
+        else:
+            self._response_metadata = _no_metadata
+
+        # Sink calls are queued and drained by one background thread, off the request path.
+        # The queue is bounded: if the sinks fall behind, new jobs are dropped and counted
+        # (reported as the dropped_jobs metric) rather than growing memory or blocking
+        # the agent.
+        self._emit_queue: queue.Queue = queue.Queue(maxsize=_EMIT_QUEUE_SIZE)
+        self.dropped_jobs = 0
+        self._dropped_lock = threading.Lock()
+        buffer_size = config.dataset.buffer_size
+        self._emit_batch_size = max(1, _EMIT_BATCH_SIZE if buffer_size is None else buffer_size)
+        self._submit_observability = self._build_submitter()
+        self._emit_thread = threading.Thread(
+            target=_emit_loop,
+            args=(
+                self._emit_queue,
+                self._emit_batch_size,
+                self.logger,
+                # Interaction logs go out in batches of up to AE_LOG_BATCH_SIZE entries,
+                # or after AE_LOG_BATCH_MS if fewer arrive
+                max(1, _env_number("AE_LOG_BATCH_SIZE", 50, int)),
+                max(0.0, _env_number("AE_LOG_BATCH_MS", 50.0)) / 1000,
+            ),
+            name="eval_emitter",
+            daemon=True,
+        )
+        if not self._fast_path:
+            self._emit_thread.start()
+
+        # Drain and flush at interpreter exit or when the wrapper is garbage collected,
+        # bounded so exit never hangs on a slow export
+        self._finalizer = weakref.finalize(
+            self,
+            _close_sinks,
+            self._emit_queue,
+            self._emit_thread,
+            self.tracer,
+            self.dataset_collector,
+            _EXIT_FLUSH_TIMEOUT,
+        )
         self._wrap_agent()
 
-        print(f"✅ Evaluation enabled for agent: {config.agent_name}")
-        print(f"   - Logging: {'Enabled' if config.logging.enabled else 'Disabled'}")
-        print(f"   - Tracing: {'Enabled' if config.tracing.enabled else 'Disabled'}")
-        print(f"   - Metrics: {'Enabled' if config.metrics.enabled else 'Disabled'}")
-        print(f"   - Dataset: {'Enabled' if config.dataset.auto_collect else 'Disabled'}")
+        if config.verbose:
+            sys.stdout.write(
+                f"\u2705 Evaluation enabled for agent: {config.agent_name}\n"
+                f"   - Logging: {_enabled_label(config.logging.enabled)}\n"
+                f"   - Tracing: {_enabled_label(config.tracing.enabled)}\n"
+                f"   - Metrics: {_enabled_label(config.metrics.enabled)}\n"
+                f"   - Dataset: {_enabled_label(config.dataset.auto_collect)}\n"
+                f"   - Cache: {_enabled_label(config.cache.enabled)}\n"
+            )
 
     def _wrap_agent(self) -> None:
-        methods = [
-            m for m in ["generate_content", "run_async", "run", "invoke"] if hasattr(self.agent, m)
-        ]
+        methods = [m for m in _AGENT_METHODS if hasattr(self.agent, m)]
         if not methods:
             raise ValueError(
-                "Agent must have at least one of: generate_content, run, run_async, or invoke"
+                f"Agent must have at least one of: {', '.join(_AGENT_METHODS[:-1])},"
+                f" or {_AGENT_METHODS[-1]}"
             )
 
         # Check if agent is a Pydantic model
@@ -81,17 +451,25 @@ class EvaluationWrapper:
 
         for method_name in methods:
             original = getattr(self.agent, method_name)
+            self._original_methods[method_name] = original
             # Check if it's an async generator function
-            is_async_gen = inspect.isasyncgenfunction(original)
-            if method_name == "run_async" or asyncio.iscoroutinefunction(original):
-                wrapper = (
-                    self._wrap_async_generator(original)
-                    if is_async_gen
-                    else self._wrap_async_method(original)
-                )
+            if method_name == "run_async" or inspect.iscoroutinefunction(original):
+                if inspect.isasyncgenfunction(original):
+                    wrapper = self._wrap_async_generator(original)
+                elif self.cache and method_name == "generate_content":
+                    wrapper = self._wrap_async_method(self._wrap_cached(original))
+                else:
+                    wrapper = self._wrap_async_method(original)
+            elif inspect.isgeneratorfunction(original):
+                wrapper = self._wrap_sync_generator(original)
+            elif self.cache and method_name == "generate_content":
+                # Cache sits inside the observability wrapper so hits are still logged
+                wrapper = self._wrap_sync_method(self._wrap_cached(original))
             else:
                 wrapper = self._wrap_sync_method(original)
-            self._original_methods[method_name] = original
+            if wrapper is original:
+                # Fast path: nothing is recorded, so the method stays unwrapped
+                continue
 
             # Use object.__setattr__ to bypass Pydantic validation for Pydantic models
             if is_pydantic:
@@ -99,57 +477,131 @@ class EvaluationWrapper:
             else:
                 setattr(self.agent, method_name, wrapper)
 
+    def _wrap_cached(self, original_method: Callable) -> Callable:
+        """Short-circuit calls whose prompt is semantically close to a cached one."""
+        cache = self.cache
+
+        def namespace_of():
+            # Partition by system instruction to avoid cross-agent pollution
+            instruction = getattr(self.agent, "system_instruction", None)
+            return hash(instruction) if isinstance(instruction, str) else None
+
+        if inspect.iscoroutinefunction(original_method):
+
+            async def wrapped_async(*args, **kwargs):
+                prompt = args[0] if args else kwargs.get("prompt")
+                if not isinstance(prompt, str):
+                    return await original_method(*args, **kwargs)
+
+                # Not imported at module level: only async agents need it, and a loop is
+                # already running here, so asyncio is loaded and the import is free
+                import asyncio
+
+                namespace = namespace_of()
+                try:
+                    # Embedding is CPU-bound; keep it off the event loop
+                    cached, vector = await asyncio.to_thread(cache.lookup, prompt, namespace)
+                except Exception as e:
+                    warn("Semantic cache lookup failed: %s", e)
+                    return await original_method(*args, **kwargs)
+                if cached is not None:
+                    return cached
+
+                response = await original_method(*args, **kwargs)
+                _cache_add(cache, vector, response, namespace)
+                return response
+
+            return _named_like(wrapped_async, original_method)
+
+        def wrapped(*args, **kwargs):
+            prompt = args[0] if args else kwargs.get("prompt")
+            if not isinstance(prompt, str):
+                return original_method(*args, **kwargs)
+
+            namespace = namespace_of()
+            try:
+                cached, vector = cache.lookup(prompt, namespace)
+            except Exception as e:
+                warn("Semantic cache lookup failed: %s", e)
+                return original_method(*args, **kwargs)
+            if cached is not None:
+                return cached
+
+            response = original_method(*args, **kwargs)
+            _cache_add(cache, vector, response, namespace)
+            return response
+
+        return _named_like(wrapped, original_method)
+
     def _wrap_async_generator(self, original_method: Callable) -> Callable:
         """Wrap an async generator method (e.g., runner.run_async)."""
+        if self._fast_path:
+            return original_method
+        # Bind per-call lookups once at wrap time
+        do_trace = self._do_trace
+        trace_context = _trace_context
+        tool_calls = _tool_calls
+        last_trajectory = _last_trajectory
+        track_trajectories = self._track_trajectories
+        extract_output = self._extract_output
+        extract_metadata = self._response_metadata
+        next_id = _next_id
+        now = time.time
+        perf_counter_ns = time.perf_counter_ns
+        trace_threshold = self._trace_threshold
+        trace_all = trace_threshold >= _TRACE_SAMPLE_SCALE
+        open_trace = _open_trace
+        restore = _restore
 
-        @functools.wraps(original_method)
         async def wrapped(*args, **kwargs):
-            interaction_id = str(uuid.uuid4())
+            interaction_id = next_id()
 
-            # Initialize trajectory tracking for this interaction
-            if self.config.logging.include_trajectories:
-                self._tool_traces.traces = []
+            # Initialize trajectory tracking for this interaction; the list is kept so it
+            # can be read back at the end without another ContextVar lookup
+            calls = tool_calls_token = None
+            if track_trajectories:
+                calls = []
+                tool_calls_token = tool_calls.set(calls)
 
             # Extract input from new_message Content object
             input_data = ""
-            if kwargs.get("new_message"):
-                msg = kwargs["new_message"]
-                if hasattr(msg, "parts") and msg.parts:
-                    input_data = " ".join(
-                        part.text for part in msg.parts if hasattr(part, "text") and part.text
-                    )
-                elif hasattr(msg, "text"):
-                    input_data = msg.text
+            msg = kwargs.get("new_message")
+            if msg:
+                parts = getattr(msg, "parts", None)
+                if parts:
+                    input_data = _parts_text(parts)
+                else:
+                    input_data = getattr(msg, "text", input_data)
             elif args:
                 input_data = str(args[0])
 
-            trace_id, parent_span_id = None, None
-            if self.tracer:
-                trace_id = self.tracer.generate_trace_id()
-                parent_span_id = uuid.uuid4().hex[:16]
-                # Set trace context BEFORE calling the generator so tools can access it
-                self._trace_context.context = (trace_id, parent_span_id)
+            # Set trace context BEFORE calling the generator so tools can access it
+            trace_id = parent_span_id = outer_span_id = tool_spans = trace_token = None
+            if do_trace:
+                trace_id, parent_span_id, outer_span_id, tool_spans, trace_token = open_trace(
+                    trace_all, trace_threshold
+                )
 
+            # Wall clock for span timestamps, perf_counter_ns (monotonic, integer) for the duration
+            start = now()
+            t0 = perf_counter_ns()
             try:
-                start = time.time()
                 final_response = None
 
                 async for item in original_method(*args, **kwargs):
                     final_response = item
                     yield item
 
-                duration_ms = (time.time() - start) * 1000
-                output_data = self._extract_output(final_response) if final_response else ""
-                metadata = self._extract_metadata(final_response) if final_response else {}
+                duration_ns = perf_counter_ns() - t0
+                output_data = extract_output(final_response) if final_response else ""
+                metadata = extract_metadata(final_response) if final_response else _EMPTY_METADATA
 
                 # Get trajectory if tracking is enabled
                 trajectory = None
-                if self.config.logging.include_trajectories and hasattr(
-                    self._tool_traces, "traces"
-                ):
-                    trajectory = self._tool_traces.traces if self._tool_traces.traces else None
-                    # Store for synchronous access
-                    self._last_trajectory = trajectory.copy() if trajectory else None
+                if track_trajectories:
+                    trajectory = calls or None
+                    # Store for get_last_trajectory
+                    last_trajectory.set(trajectory.copy() if trajectory else None)
 
                 if not self._shutdown_called:
                     self._submit_observability(
@@ -158,13 +610,15 @@ class EvaluationWrapper:
                         interaction_id,
                         input_data,
                         output_data,
-                        duration_ms,
+                        duration_ns,
                         metadata,
                         start,
                         trajectory=trajectory,
+                        outer_span_id=outer_span_id,
+                        tool_spans=tool_spans,
                     )
             except Exception as e:
-                duration_ms = (time.time() - start) * 1000
+                duration_ns = perf_counter_ns() - t0
                 error_msg = str(e)
                 if not self._shutdown_called:
                     self._submit_observability(
@@ -173,26 +627,50 @@ class EvaluationWrapper:
                         interaction_id,
                         input_data,
                         f"ERROR: {error_msg}",
-                        duration_ms,
+                        duration_ns,
                         {"error": True, "error_type": type(e).__name__},
                         start,
                         is_error=True,
+                        outer_span_id=outer_span_id,
+                        tool_spans=tool_spans,
                     )
                 raise
             finally:
-                if self.tracer:
-                    self._trace_context.context = None
+                if trace_token is not None:
+                    restore(trace_context, trace_token)
+                if tool_calls_token is not None:
+                    restore(tool_calls, tool_calls_token)
 
-        return wrapped
+        return _named_like(wrapped, original_method)
 
     def _wrap_async_method(self, original_method: Callable) -> Callable:
-        @functools.wraps(original_method)
+        if self._fast_path:
+            return original_method
+        # Bind per-call lookups once at wrap time
+        do_trace = self._do_trace
+        trace_context = _trace_context
+        tool_calls = _tool_calls
+        last_trajectory = _last_trajectory
+        track_trajectories = self._track_trajectories
+        extract_output = self._extract_output
+        extract_metadata = self._response_metadata
+        next_id = _next_id
+        now = time.time
+        perf_counter_ns = time.perf_counter_ns
+        trace_threshold = self._trace_threshold
+        trace_all = trace_threshold >= _TRACE_SAMPLE_SCALE
+        open_trace = _open_trace
+        restore = _restore
+
         async def wrapped(*args, **kwargs):
-            interaction_id = str(uuid.uuid4())
+            interaction_id = next_id()
 
-            # Initialize trajectory tracking for this interaction
-            if self.config.logging.include_trajectories:
-                self._tool_traces.traces = []
+            # Initialize trajectory tracking for this interaction; the list is kept so it
+            # can be read back at the end without another ContextVar lookup
+            calls = tool_calls_token = None
+            if track_trajectories:
+                calls = []
+                tool_calls_token = tool_calls.set(calls)
 
             input_data = (
                 args[0]
@@ -204,27 +682,27 @@ class EvaluationWrapper:
                 or ""
             )
 
-            trace_id, parent_span_id = None, None
-            if self.tracer:
-                trace_id = self.tracer.generate_trace_id()
-                parent_span_id = uuid.uuid4().hex[:16]
-                self._trace_context.context = (trace_id, parent_span_id)
+            trace_id = parent_span_id = outer_span_id = tool_spans = trace_token = None
+            if do_trace:
+                trace_id, parent_span_id, outer_span_id, tool_spans, trace_token = open_trace(
+                    trace_all, trace_threshold
+                )
 
+            # Wall clock for span timestamps, perf_counter_ns (monotonic, integer) for the duration
+            start = now()
+            t0 = perf_counter_ns()
             try:
-                start = time.time()
                 response = await original_method(*args, **kwargs)
-                duration_ms = (time.time() - start) * 1000
+                duration_ns = perf_counter_ns() - t0
 
-                output_data = self._extract_output(response)
-                metadata = self._extract_metadata(response)
+                output_data = extract_output(response)
+                metadata = extract_metadata(response)
 
                 # Get trajectory if tracking is enabled
                 trajectory = None
-                if self.config.logging.include_trajectories and hasattr(
-                    self._tool_traces, "traces"
-                ):
-                    trajectory = self._tool_traces.traces if self._tool_traces.traces else None
-                    self._last_trajectory = trajectory.copy() if trajectory else None
+                if track_trajectories:
+                    trajectory = calls or None
+                    last_trajectory.set(trajectory.copy() if trajectory else None)
 
                 if not self._shutdown_called:
                     self._submit_observability(
@@ -233,15 +711,17 @@ class EvaluationWrapper:
                         interaction_id,
                         input_data,
                         output_data,
-                        duration_ms,
+                        duration_ns,
                         metadata,
                         start,
                         trajectory=trajectory,
+                        outer_span_id=outer_span_id,
+                        tool_spans=tool_spans,
                     )
 
                 return response
             except Exception as e:
-                duration_ms = (time.time() - start) * 1000
+                duration_ns = perf_counter_ns() - t0
                 error_msg = str(e)
                 if not self._shutdown_called:
                     self._submit_observability(
@@ -250,26 +730,157 @@ class EvaluationWrapper:
                         interaction_id,
                         input_data,
                         f"ERROR: {error_msg}",
-                        duration_ms,
+                        duration_ns,
                         {"error": True, "error_type": type(e).__name__},
                         start,
                         is_error=True,
+                        outer_span_id=outer_span_id,
+                        tool_spans=tool_spans,
                     )
                 raise
             finally:
-                if self.tracer:
-                    self._trace_context.context = None
+                if trace_token is not None:
+                    restore(trace_context, trace_token)
+                if tool_calls_token is not None:
+                    restore(tool_calls, tool_calls_token)
+
+        return _named_like(wrapped, original_method)
+
+    def _wrap_sync_generator(self, original_method: Callable) -> Callable:
+        """Wrap a streaming method (e.g., stream_content) and log the accumulated text."""
+        if self._fast_path:
+            return original_method
+        # Bind per-call lookups once at wrap time
+        do_trace = self._do_trace
+        trace_context = _trace_context
+        tool_calls = _tool_calls
+        last_trajectory = _last_trajectory
+        track_trajectories = self._track_trajectories
+        extract_output = self._extract_output
+        extract_metadata = self._response_metadata
+        next_id = _next_id
+        now = time.time
+        perf_counter_ns = time.perf_counter_ns
+        trace_threshold = self._trace_threshold
+        trace_all = trace_threshold >= _TRACE_SAMPLE_SCALE
+        open_trace = _open_trace
+        restore = _restore
+
+        def wrapped(*args, **kwargs):
+            interaction_id = next_id()
+
+            # Initialize trajectory tracking for this interaction; the list is kept so it
+            # can be read back at the end without another ContextVar lookup
+            calls = tool_calls_token = None
+            if track_trajectories:
+                calls = []
+                tool_calls_token = tool_calls.set(calls)
+
+            input_data = (
+                args[0]
+                if args
+                else kwargs.get("prompt") or kwargs.get("input") or kwargs.get("message") or ""
+            )
+
+            trace_id = parent_span_id = outer_span_id = tool_spans = trace_token = None
+            if do_trace:
+                trace_id, parent_span_id, outer_span_id, tool_spans, trace_token = open_trace(
+                    trace_all, trace_threshold
+                )
 
-        return wrapped
+            # Wall clock for span timestamps, perf_counter_ns (monotonic, integer) for the duration
+            start = now()
+            t0 = perf_counter_ns()
+            try:
+                texts = []
+                last_chunk = None
+
+                for chunk in original_method(*args, **kwargs):
+                    text = extract_output(chunk)
+                    if text:
+                        texts.append(text)
+                    last_chunk = chunk
+                    yield chunk
+
+                duration_ns = perf_counter_ns() - t0
+                output_data = "".join(texts)
+                # Usage metadata arrives on the final chunk
+                metadata = extract_metadata(last_chunk) if last_chunk else _EMPTY_METADATA
+
+                # Get trajectory if tracking is enabled
+                trajectory = None
+                if track_trajectories:
+                    trajectory = calls or None
+                    last_trajectory.set(trajectory.copy() if trajectory else None)
+
+                if not self._shutdown_called:
+                    self._submit_observability(
+                        trace_id,
+                        parent_span_id,
+                        interaction_id,
+                        input_data,
+                        output_data,
+                        duration_ns,
+                        metadata,
+                        start,
+                        trajectory=trajectory,
+                        outer_span_id=outer_span_id,
+                        tool_spans=tool_spans,
+                    )
+            except Exception as e:
+                duration_ns = perf_counter_ns() - t0
+                error_msg = str(e)
+                if not self._shutdown_called:
+                    self._submit_observability(
+                        trace_id,
+                        parent_span_id,
+                        interaction_id,
+                        input_data,
+                        f"ERROR: {error_msg}",
+                        duration_ns,
+                        {"error": True, "error_type": type(e).__name__},
+                        start,
+                        is_error=True,
+                        outer_span_id=outer_span_id,
+                        tool_spans=tool_spans,
+                    )
+                raise
+            finally:
+                if trace_token is not None:
+                    restore(trace_context, trace_token)
+                if tool_calls_token is not None:
+                    restore(tool_calls, tool_calls_token)
+
+        return _named_like(wrapped, original_method)
 
     def _wrap_sync_method(self, original_method: Callable) -> Callable:
-        @functools.wraps(original_method)
+        if self._fast_path:
+            return original_method
+        # Bind per-call lookups once at wrap time
+        do_trace = self._do_trace
+        trace_context = _trace_context
+        tool_calls = _tool_calls
+        last_trajectory = _last_trajectory
+        track_trajectories = self._track_trajectories
+        extract_output = self._extract_output
+        extract_metadata = self._response_metadata
+        next_id = _next_id
+        now = time.time
+        perf_counter_ns = time.perf_counter_ns
+        trace_threshold = self._trace_threshold
+        trace_all = trace_threshold >= _TRACE_SAMPLE_SCALE
+        open_trace = _open_trace
+        restore = _restore
+
         def wrapped(*args, **kwargs):
-            interaction_id = str(uuid.uuid4())
+            interaction_id = next_id()
 
-            # Initialize trajectory tracking for this interaction
-            if self.config.logging.include_trajectories:
-                self._tool_traces.traces = []
+            # Initialize trajectory tracking for this interaction; the list is kept so it
+            # can be read back at the end without another ContextVar lookup
+            calls = tool_calls_token = None
+            if track_trajectories:
+                calls = []
+                tool_calls_token = tool_calls.set(calls)
 
             input_data = (
                 args[0]
@@ -277,27 +888,27 @@ class EvaluationWrapper:
                 else kwargs.get("prompt") or kwargs.get("input") or kwargs.get("message") or ""
             )
 
-            trace_id, parent_span_id = None, None
-            if self.tracer:
-                trace_id = self.tracer.generate_trace_id()
-                parent_span_id = uuid.uuid4().hex[:16]
-                self._trace_context.context = (trace_id, parent_span_id)
+            trace_id = parent_span_id = outer_span_id = tool_spans = trace_token = None
+            if do_trace:
+                trace_id, parent_span_id, outer_span_id, tool_spans, trace_token = open_trace(
+                    trace_all, trace_threshold
+                )
 
+            # Wall clock for span timestamps, perf_counter_ns (monotonic, integer) for the duration
+            start = now()
+            t0 = perf_counter_ns()
             try:
-                start = time.time()
                 response = original_method(*args, **kwargs)
-                duration_ms = (time.time() - start) * 1000
+                duration_ns = perf_counter_ns() - t0
 
-                output_data = self._extract_output(response)
-                metadata = self._extract_metadata(response)
+                output_data = extract_output(response)
+                metadata = extract_metadata(response)
 
                 # Get trajectory if tracking is enabled
                 trajectory = None
-                if self.config.logging.include_trajectories and hasattr(
-                    self._tool_traces, "traces"
-                ):
-                    trajectory = self._tool_traces.traces if self._tool_traces.traces else None
-                    self._last_trajectory = trajectory.copy() if trajectory else None
+                if track_trajectories:
+                    trajectory = calls or None
+                    last_trajectory.set(trajectory.copy() if trajectory else None)
 
                 if not self._shutdown_called:
                     self._submit_observability(
@@ -306,69 +917,108 @@ class EvaluationWrapper:
                         interaction_id,
                         input_data,
                         output_data,
-                        duration_ms,
+                        duration_ns,
                         metadata,
                         start,
                         trajectory=trajectory,
+                        outer_span_id=outer_span_id,
+                        tool_spans=tool_spans,
                     )
 
                 return response
             finally:
-                if self.tracer:
-                    self._trace_context.context = None
+                if trace_token is not None:
+                    restore(trace_context, trace_token)
+                if tool_calls_token is not None:
+                    restore(tool_calls, tool_calls_token)
 
-        return wrapped
+        return _named_like(wrapped, original_method)
 
-    def _submit_observability(
-        self,
-        trace_id,
-        parent_span_id,
-        interaction_id,
-        input_data,
-        output_data,
-        duration_ms,
-        metadata,
-        start,
-        is_error=False,
-        trajectory=None,
-    ):
-        def safe_submit(func, *args):
-            try:
-                self._executor.submit(func, *args)
-            except RuntimeError:
-                pass
+    def _safe_submit(self, log_entry: Optional[tuple], sends: list) -> None:
+        """Queue one interaction's log entry and sink sends for the emitter thread.
 
-        if self.tracer and trace_id:
-            safe_submit(
-                self._send_trace_spans,
-                trace_id,
-                parent_span_id,
-                interaction_id,
-                input_data,
-                output_data,
-                start,
-                start + duration_ms / 1000,
-                start,
-                start,
-            )
+        Submits after shutdown are ignored, and the job is dropped (and counted) if
+        the queue is full.
+        """
+        if self._shutdown_called:
+            return
+        try:
+            self._emit_queue.put_nowait((log_entry, sends))
+        except queue.Full:
+            # Several agent threads can overflow at once; += isn't atomic
+            with self._dropped_lock:
+                self.dropped_jobs += 1
 
-        if self.logger and self.config.logging.include_trajectories:
-            safe_submit(
-                self._send_log, interaction_id, input_data, output_data, duration_ms, metadata
-            )
+    def _build_submitter(self) -> Callable:
+        """Build the per-call sink dispatcher for the sinks enabled in this wrapper.
 
-        if self.metrics:
-            safe_submit(self._send_metrics, duration_ms, metadata, is_error)
+        The enabled flags and bound sink methods are fixed after __init__, so they
+        are resolved here once instead of being re-read from self on every call.
+        """
+        safe_submit = self._safe_submit
+        do_trace, do_log = self._do_trace, self._do_log
+        do_metrics, do_collect = self._do_metrics, self._do_collect
+        send_trace_spans = self._send_trace_spans
+        send_metrics = self._send_metrics
+        send_dataset = self._send_dataset
+
+        def submit_observability(
+            trace_id,
+            parent_span_id,
+            interaction_id,
+            input_data,
+            output_data,
+            duration_ns,
+            metadata,
+            start,
+            is_error=False,
+            trajectory=None,
+            outer_span_id=None,
+            tool_spans=None,
+        ):
+            duration_ms = duration_ns / 1_000_000
+            # One queued job per interaction; the emitter runs the sends in order
+            sends = []
+
+            if do_trace and trace_id:
+                sends.append(
+                    (
+                        send_trace_spans,
+                        (
+                            trace_id,
+                            parent_span_id,
+                            interaction_id,
+                            input_data,
+                            output_data,
+                            start,
+                            start + duration_ns / 1_000_000_000,
+                            start,
+                            start,
+                            outer_span_id,
+                            tool_spans,
+                        ),
+                    )
+                )
 
-        if self.dataset_collector:
-            safe_submit(
-                self._send_dataset,
-                interaction_id,
-                input_data,
-                output_data,
-                metadata,
-                trajectory,
+            if do_metrics:
+                sends.append((send_metrics, (duration_ms, metadata, is_error)))
+
+            if do_collect:
+                sends.append(
+                    (
+                        send_dataset,
+                        (interaction_id, input_data, output_data, metadata, trajectory),
+                    )
+                )
+
+            # The log entry is collected by the emitter and written in batches
+            log_entry = (
+                (interaction_id, input_data, output_data, duration_ms, metadata) if do_log else None
             )
+            if log_entry is not None or sends:
+                safe_submit(log_entry, sends)
+
+        return submit_observability
 
     def _send_trace_spans(
         self,
@@ -381,62 +1031,78 @@ class EvaluationWrapper:
         llm_end,
         extract_start,
         extract_end,
+        outer_span_id=None,
+        tool_spans=None,
     ):
         try:
-            query_preview, response_preview = str(input_data)[:200], str(output_data)[:200]
+            # Stringify each value once; str() of a large dict/list prompt walks all of it
+            input_text = input_data if type(input_data) is str else str(input_data)
+            output_text = output_data if type(output_data) is str else str(output_data)
+            query_preview = input_text[:200]
             attrs = {
                 "interaction_id": interaction_id,
                 "query": query_preview,
-                "response": response_preview,
-                "input_length": len(str(input_data)),
-                "output_length": len(str(output_data)),
+                "response": output_text[:200],
+                "input_length": len(input_text),
+                "output_length": len(output_text),
             }
-            self.tracer._send_span(
-                trace_id, parent_span_id, "agent.generate_content", llm_start, extract_end, attrs
-            )
-            self.tracer._send_span(
-                trace_id,
-                uuid.uuid4().hex[:16],
-                "llm.generate",
-                llm_start,
-                llm_end,
-                {"query": query_preview},
-                parent_span_id,
-            )
-            self.tracer._send_span(
-                trace_id,
-                uuid.uuid4().hex[:16],
-                "processing.extract",
-                extract_start,
-                extract_end,
-                {},
-                parent_span_id,
-            )
-        except Exception as e:
-            print(f"Warning: Failed to send trace spans: {e}")
-
-    def _send_log(self, interaction_id, input_data, output_data, duration_ms, metadata):
-        try:
-            self.logger.log_interaction(
-                interaction_id, input_data, output_data, duration_ms, metadata
+            # Root and child spans go out as one queue entry and land in the same export
+            self.tracer._send_spans(
+                [
+                    (
+                        trace_id,
+                        parent_span_id,
+                        "agent.generate_content",
+                        llm_start,
+                        extract_end,
+                        attrs,
+                        outer_span_id,
+                    ),
+                    (
+                        trace_id,
+                        _next_id()[:16],
+                        "llm.generate",
+                        llm_start,
+                        llm_end,
+                        {"query": query_preview},
+                        parent_span_id,
+                    ),
+                    (
+                        trace_id,
+                        _next_id()[:16],
+                        "processing.extract",
+                        extract_start,
+                        extract_end,
+                        _NO_SPAN_ATTRIBUTES,
+                        parent_span_id,
+                    ),
+                    *[
+                        _tool_span(trace_id, parent_span_id, *tool_span)
+                        for tool_span in tool_spans or ()
+                    ],
+                ]
             )
         except Exception as e:
-            print(f"Warning: Failed to send log: {e}")
+            warn("Failed to send trace spans: %s", e)
 
     def _send_metrics(self, duration_ms, metadata, is_error=False):
+        metrics = self.metrics
         try:
             if is_error:
                 error_type = metadata.get("error_type", "UnknownError")
-                self.metrics.record_error(error_type)
+                metrics.record_error(error_type)
             else:
-                self.metrics.record_latency(duration_ms)
-                self.metrics.record_success()
-                if metadata.get("input_tokens") and metadata.get("output_tokens"):
-                    self.metrics.record_token_count(
-                        metadata["input_tokens"], metadata["output_tokens"]
-                    )
+                metrics.record_latency(duration_ms)
+                metrics.record_success()
+                input_tokens = metadata.get("input_tokens")
+                output_tokens = metadata.get("output_tokens")
+                if input_tokens and output_tokens:
+                    metrics.record_token_count(input_tokens, output_tokens)
+            if self.dropped_jobs:
+                # Running total, so a throttled write never hides drops from the gauge
+                metrics.record_dropped_jobs(self.dropped_jobs)
         except Exception as e:
-            print(f"Warning: Failed to send metrics: {e}")
+            warn("Failed to send metrics: %s", e)
 
     def _send_dataset(self, interaction_id, input_data, output_data, metadata, trajectory=None):
         try:
@@ -444,206 +1110,380 @@ class EvaluationWrapper:
                 interaction_id, input_data, output_data, metadata, trajectory
             )
         except Exception as e:
-            print(f"Warning: Failed to add dataset entry: {e}")
+            warn("Failed to add dataset entry: %s", e)
 
     def _extract_output(self, response):
+        fn = self._output_extractor_cache.get(type(response))
+        if fn is None:
+            fn = self._build_output_extractor(type(response))
+            if len(self._output_extractor_cache) < _EXTRACTOR_CACHE_SIZE:
+                self._output_extractor_cache[type(response)] = fn
+        return fn(response)
+
+    def _extract_metadata(self, response):
+        fn = self._metadata_extractor_cache.get(type(response))
+        if fn is None:
+            fn = self._build_metadata_extractor(type(response))
+            if len(self._metadata_extractor_cache) < _EXTRACTOR_CACHE_SIZE:
+                self._metadata_extractor_cache[type(response)] = fn
+        return fn(response)
+
+    def _extract_token_usage(self, response) -> Tuple[Optional[int], Optional[int]]:
+        """Get (input_tokens, output_tokens) without building the full metadata dict."""
+        fn = self._token_usage_extractor_cache.get(type(response))
+        if fn is None:
+            fn = self._build_token_usage_extractor(type(response))
+            if len(self._token_usage_extractor_cache) < _EXTRACTOR_CACHE_SIZE:
+                self._token_usage_extractor_cache[type(response)] = fn
+        return fn(response)
+
+    def _build_token_usage_extractor(self, cls: type) -> Callable:
+        """Pick the token-count path for a response type (see _build_output_extractor)."""
+        if cls is str:
+            return _no_token_usage
+        attrs = _fixed_attributes(cls)
+        if attrs is None:
+            return self._probe_token_usage
+
+        has_usage = "usage_metadata" in attrs
+        direct_input = "prompt_token_count" in attrs
+        direct_output = "candidates_token_count" in attrs
+
+        def extract(response):
+            usage = response.usage_metadata if has_usage else None
+            return (
+                (
+                    response.prompt_token_count
+                    if direct_input
+                    else getattr(usage, "prompt_token_count", None)
+                ),
+                (
+                    response.candidates_token_count
+                    if direct_output
+                    else getattr(usage, "candidates_token_count", None)
+                ),
+            )
+
+        return extract
+
+    def _probe_token_usage(self, response) -> Tuple[Optional[int], Optional[int]]:
+        if isinstance(response, dict):
+            metadata = response.get("metadata") or {}
+            return metadata.get("input_tokens"), metadata.get("output_tokens")
+        usage = getattr(response, "usage_metadata", None)
+        return (
+            getattr(response, "prompt_token_count", getattr(usage, "prompt_token_count", None)),
+            getattr(
+                response, "candidates_token_count", getattr(usage, "candidates_token_count", None)
+            ),
+        )
+
+    def _token_metadata(self, response):
+        input_tokens, output_tokens = self._extract_token_usage(response)
+        metadata = {}
+        if input_tokens is not None:
+            metadata["input_tokens"] = input_tokens
+        if output_tokens is not None:
+            metadata["output_tokens"] = output_tokens
+        return metadata
+
+    def _build_output_extractor(self, cls: type) -> Callable:
+        """Pick the output extraction path for a response type.
+
+        Only str, dict and pydantic models (google.genai responses, ADK events) are
+        specialized; their attributes are fixed by the type. Anything else keeps
+        the per-call attribute probing.
+        """
+        if cls is str:
+            return _identity
+        if cls is dict:
+            return _dict_output
+        attrs = _fixed_attributes(cls)
+        if attrs is None:
+            return self._probe_output
+        if "text" in attrs:
+            return operator.attrgetter("text")
+        if "content" in attrs:
+            return lambda response: _content_output(response.content)
+        if "candidates" in attrs:
+
+            def from_candidates(response):
+                text = _candidates_output(response)
+                return str(response) if text is None else text
+
+            return from_candidates
+        return str
+
+    def _build_metadata_extractor(self, cls: type) -> Callable:
+        """Pick the metadata extraction path for a response type.
+
+        Pydantic responses get a closure that reads only the token/model fields
+        the type actually declares; plain strings carry none, and other types
+        fall back to probing.
+        """
+        if cls is str:
+            return _no_metadata
+        attrs = _fixed_attributes(cls)
+        if attrs is None:
+            return self._probe_metadata
+
+        has_usage = "usage_metadata" in attrs
+        direct = [
+            (attr, key)
+            for attr, key in (
+                ("prompt_token_count", "input_tokens"),
+                ("candidates_token_count", "output_tokens"),
+                ("total_token_count", "total_tokens"),
+                ("model", "model"),
+            )
+            if attr in attrs
+        ]
+
+        # Only non-None values are stored, so the result needs no filtering pass
+        def extract(response):
+            metadata = {}
+            if has_usage:
+                usage = response.usage_metadata
+                for attr, key in _USAGE_FIELDS:
+                    value = getattr(usage, attr, None)
+                    if value is not None:
+                        metadata[key] = value
+            for attr, key in direct:
+                value = getattr(response, attr)
+                if value is not None:
+                    metadata[key] = value
+                elif key in metadata:
+                    # An unset direct field overrides usage_metadata, as in _probe_metadata
+                    del metadata[key]
+            return metadata
+
+        return extract
+
+    def _probe_output(self, response):
         if isinstance(response, str):
             return response
-        if hasattr(response, "text"):
-            return response.text
+        # One getattr per attribute; _MISSING keeps "present but None" distinct
+        text = getattr(response, "text", _MISSING)
+        if text is not _MISSING:
+            return text
         # Handle ADK event objects (events have content.parts)
-        if hasattr(response, "content"):
-            content = response.content
-            if hasattr(content, "parts") and content.parts:
-                # Extract text from all text parts
-                texts = []
-                for part in content.parts:
-                    if hasattr(part, "text") and part.text:
-                        texts.append(part.text)
-                if texts:
-                    return " ".join(texts)
-            if isinstance(content, str):
-                return content
-            return getattr(content, "text", "")
-        if hasattr(response, "candidates") and response.candidates:
-            candidate = response.candidates[0]
-            if hasattr(candidate, "content"):
-                if hasattr(candidate.content, "parts"):
-                    return " ".join(
-                        part.text for part in candidate.content.parts if hasattr(part, "text")
-                    )
-                return getattr(candidate.content, "text", "")
+        content = getattr(response, "content", _MISSING)
+        if content is not _MISSING:
+            return _content_output(content)
+        if getattr(response, "candidates", _MISSING) is not _MISSING:
+            text = _candidates_output(response)
+            if text is not None:
+                return text
         if isinstance(response, dict):
-            for key in ["output", "response", "text", "content", "message"]:
-                if key in response:
-                    return str(response[key])
+            return _dict_output(response)
         return str(response)
 
-    def _extract_metadata(self, response):
+    def _probe_metadata(self, response):
         metadata = {}
-        if hasattr(response, "usage_metadata"):
-            usage = response.usage_metadata
-            metadata["input_tokens"] = getattr(usage, "prompt_token_count", None)
-            metadata["output_tokens"] = getattr(usage, "candidates_token_count", None)
-            metadata["total_tokens"] = getattr(usage, "total_token_count", None)
-        if isinstance(response, dict) and "metadata" in response:
+        # One getattr per attribute; a present-but-None field still overrides usage_metadata
+        usage = getattr(response, "usage_metadata", _MISSING)
+        if usage is not _MISSING:
+            for attr, key in _USAGE_FIELDS:
+                metadata[key] = getattr(usage, attr, None)
+        is_dict = isinstance(response, dict)
+        if is_dict and "metadata" in response:
             metadata.update(response["metadata"])
-        if hasattr(response, "prompt_token_count"):
-            metadata["input_tokens"] = response.prompt_token_count
-        if hasattr(response, "candidates_token_count"):
-            metadata["output_tokens"] = response.candidates_token_count
-        if hasattr(response, "total_token_count"):
-            metadata["total_tokens"] = response.total_token_count
-        if hasattr(response, "model"):
-            metadata["model"] = response.model
-        elif isinstance(response, dict) and "model" in response:
+        for attr, key in _USAGE_FIELDS:
+            value = getattr(response, attr, _MISSING)
+            if value is not _MISSING:
+                metadata[key] = value
+        model = getattr(response, "model", _MISSING)
+        if model is not _MISSING:
+            metadata["model"] = model
+        elif is_dict and "model" in response:
             metadata["model"] = response["model"]
         return {k: v for k, v in metadata.items() if v is not None}
 
-    def flush(self):
+    def flush(self, timeout: float = 60.0):
+        """Wait for queued background jobs, then flush tracer and dataset buffers.
+
+        Args:
+            timeout: Max seconds to wait on each step
+        """
+        if self._emit_thread.is_alive():
+            drained = threading.Event()
+            try:
+                self._emit_queue.put(drained, timeout=timeout)
+                drained.wait(timeout)
+            except queue.Full:
+                pass
+        if self.tracer:
+            self.tracer.flush(timeout)
         if self.dataset_collector:
-            self.dataset_collector.flush()
+            self.dataset_collector.flush(timeout=timeout)
 
     def get_last_trajectory(self):
-        """Get the trajectory from the last agent interaction.
+        """Get the trajectory from the last agent interaction in the calling thread or task.
 
         Returns:
             List of tool call dictionaries, or None if no trajectory captured
         """
-        return self._last_trajectory
+        return _last_trajectory.get()
 
-    def shutdown(self):
+    def shutdown(self, timeout: float = 60.0):
         """Public method for graceful shutdown.
 
         Flushes pending data and shuts down background threads.
+
+        Args:
+            timeout: Max seconds to wait on each step
         """
         if self._shutdown_called:
             return
         self._shutdown_called = True
-        try:
-            self._executor.shutdown(wait=True, timeout=10.0)
-            self.flush()
-        except Exception:
-            pass
+        self._finalizer.detach()
+        _close_sinks(
+            self._emit_queue, self._emit_thread, self.tracer, self.dataset_collector, timeout
+        )
+        if self.dropped_jobs:
+            warn("Dropped %d observability jobs (emit queue full)", self.dropped_jobs)
 
-    def _shutdown(self):
-        """Private method for internal use (atexit, __del__)."""
+    def __enter__(self) -> "EvaluationWrapper":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Flush and shut down deterministically instead of relying on the finalizer."""
         self.shutdown()
 
+    def propagate_context(self, func: Callable) -> Callable:
+        """Bind func to the calling context's trace span and trajectory.
+
+        Use this when an agent runs tools on worker threads so their tool spans
+        and trajectory entries still attach to the current interaction.
+
+        Args:
+            func: Tool function (typically decorated with tool_trace)
+
+        Returns:
+            Callable that runs func with the captured context
+        """
+        context = contextvars.copy_context()
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            # A Context can only be entered by one thread at a time; copies are cheap
+            return context.copy().run(func, *args, **kwargs)
+
+        return run
+
     def tool_trace(self, tool_name):
         def decorator(func):
+            # Nothing to record: hand back the tool itself, with no per-call overhead
+            if not self._do_trace and not self._track_trajectories:
+                return func
+            # Bind per-call lookups once at decoration time
+            do_trace = self._do_trace
+            track_trajectories = self._track_trajectories
+            now = time.time
+            perf_counter_ns = time.perf_counter_ns
+
             @functools.wraps(func)
             def wrapped(*args, **kwargs):
-                trace_context = getattr(self._trace_context, "context", None)
-                start = time.time()
+                trace_context = _trace_context.get()
+                tool_calls = _tool_calls.get()
+                # One wall-clock read; the end time is derived from the monotonic duration
+                start = now()
+                t0 = perf_counter_ns()
 
                 try:
                     result = func(*args, **kwargs)
-                    duration_ms = (time.time() - start) * 1000
+                    duration_ns = perf_counter_ns() - t0
+                    end = start + duration_ns / 1_000_000_000
 
                     # Add to trajectory if tracking is enabled
-                    if self.config.logging.include_trajectories and hasattr(
-                        self._tool_traces, "traces"
-                    ):
+                    if track_trajectories and tool_calls is not None:
                         tool_entry = {
                             "type": "tool_call",
                             "tool_name": tool_name,
-                            "duration_ms": round(duration_ms, 2),
-                            "timestamp": time.time(),
+                            "duration_ms": round(duration_ns / 1_000_000, 2),
+                            "timestamp": end,
                         }
-                        self._tool_traces.traces.append(tool_entry)
-
-                    # Send to tracer if available
-                    if self.tracer and trace_context and not self._shutdown_called:
-                        trace_id, parent_span_id = trace_context
-                        try:
-                            self._executor.submit(
-                                self._send_tool_span,
-                                trace_id,
-                                parent_span_id,
-                                tool_name,
-                                start,
-                                time.time(),
-                                None,
-                            )
-                        except RuntimeError:
-                            pass
+                        tool_calls.append(tool_entry)
+
+                    # Exported with the enclosing agent call's spans
+                    if do_trace and trace_context:
+                        trace_context[2].append((tool_name, start, end, None))
                     return result
 
                 except Exception as e:
-                    duration_ms = (time.time() - start) * 1000
+                    duration_ns = perf_counter_ns() - t0
+                    end = start + duration_ns / 1_000_000_000
 
                     # Add error to trajectory if tracking is enabled
-                    if self.config.logging.include_trajectories and hasattr(
-                        self._tool_traces, "traces"
-                    ):
+                    if track_trajectories and tool_calls is not None:
                         tool_entry = {
                             "type": "tool_call",
                             "tool_name": tool_name,
-                            "duration_ms": round(duration_ms, 2),
-                            "timestamp": time.time(),
+                            "duration_ms": round(duration_ns / 1_000_000, 2),
+                            "timestamp": end,
                             "error": str(e),
                         }
-                        self._tool_traces.traces.append(tool_entry)
-
-                    # Send error to tracer if available
-                    if self.tracer and trace_context and not self._shutdown_called:
-                        trace_id, parent_span_id = trace_context
-                        try:
-                            self._executor.submit(
-                                self._send_tool_span,
-                                trace_id,
-                                parent_span_id,
-                                tool_name,
-                                start,
-                                time.time(),
-                                e,
-                            )
-                        except RuntimeError:
-                            pass
+                        tool_calls.append(tool_entry)
+
+                    # Exported, with the error, alongside the enclosing agent call's spans
+                    if do_trace and trace_context:
+                        trace_context[2].append((tool_name, start, end, e))
                     raise
 
             return wrapped
 
         return decorator
 
-    def _send_tool_span(
-        self, trace_id, parent_span_id, tool_name, start_time, end_time, error=None
-    ):
-        try:
-            attrs = (
-                {
-                    "error": True,
-                    "error.type": type(error).__name__,
-                    "error.message": str(error)[:256],
-                }
-                if error
-                else {}
-            )
-            self.tracer._send_span(
-                trace_id,
-                uuid.uuid4().hex[:16],
-                f"tool.{tool_name}",
-                start_time,
-                end_time,
-                attrs,
-                parent_span_id,
-            )
-        except Exception as e:
-            print(f"Warning: Failed to send tool span: {e}")
-
     def __getattr__(self, name: str) -> Any:
         """Delegate attribute access to the wrapped agent."""
         return getattr(self.agent, name)
 
-    def __del__(self):
-        try:
-            self._shutdown()
-        except Exception:
-            pass
+
+# Wrappers already built by enable_evaluation, so repeated calls (notebook re-runs)
+# reuse the cloud clients instead of reconnecting and re-wrapping the agent
+_wrapper_cache: "weakref.WeakValueDictionary[tuple, EvaluationWrapper]" = (
+    weakref.WeakValueDictionary()
+)
+_wrapper_cache_lock = threading.Lock()
+
+
+def clear_evaluation_cache() -> None:
+    """Forget wrappers cached by enable_evaluation (e.g. between tests)."""
+    with _wrapper_cache_lock:
+        _wrapper_cache.clear()
+
+
+def _config_stamp(config_path) -> Optional[Tuple[int, int]]:
+    """Identify the config file's contents by mtime and size, as _load_yaml does."""
+    if not config_path:
+        return None
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        # Left for from_yaml to report
+        return None
+    return st.st_mtime_ns, st.st_size
 
 
 def enable_evaluation(agent, project_id, agent_name, config_path=None):
+    # The stamp makes an edited config file build a fresh wrapper
+    key = (
+        project_id,
+        agent_name,
+        config_path and str(config_path),
+        _config_stamp(config_path),
+        id(agent),
+    )
+    with _wrapper_cache_lock:
+        wrapper = _wrapper_cache.get(key)
+        if wrapper is not None and wrapper.agent is agent and not wrapper._shutdown_called:
+            return wrapper
+        wrapper = _create_wrapper(agent, project_id, agent_name, config_path)
+        _wrapper_cache[key] = wrapper
+    return wrapper
+
+
+def _create_wrapper(agent, project_id, agent_name, config_path):
     if config_path:
         config = EvaluationConfig.from_yaml(Path(config_path))
         config.project_id = project_id
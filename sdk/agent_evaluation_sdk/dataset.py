@@ -2,24 +2,114 @@
 Dataset collection for agent evaluation.
 """
 
+import io
 import json
-import tempfile
+import math
+import threading
+import time
+from collections import deque
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional
 
 from google.cloud import bigquery
+from google.cloud.exceptions import NotFound
+
+from agent_evaluation_sdk.diagnostics import warn
+
+try:
+    import orjson
+except ImportError:  # Optional: installed with the "speedups" extra
+    orjson = None
+
+_STOP = object()  # Upload queue sentinel that ends the uploader thread
+_UPLOAD_TIMEOUT = 60.0  # Max seconds a background upload waits for its load job
+_MAX_PENDING_BATCHES = 100  # Full buffers allowed to wait for the uploader before new ones drop
+_MAX_BATCH_ROWS = 10_000  # Row cap per load job, and per buffer when buffer_size is None
+
+# Datetimes and dataclasses go through default=str, as in the stdlib fallback, so the
+# stored text for them doesn't depend on whether orjson is installed
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson is not None
+    else 0
+)
+
+# One encoder instance, so default/separators aren't re-resolved on every call.
+# Compact and non-ASCII-preserving, matching orjson's output.
+_json_encode = json.JSONEncoder(
+    default=str, separators=(",", ":"), ensure_ascii=False, allow_nan=False
+).encode
+
+
+def _finite(data: Any) -> Any:
+    """Copy data with NaN/Infinity floats replaced by None."""
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, dict):
+        return {key: _finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_finite(value) for value in data]
+    return data
+
+
+def _encode_json(data: Any) -> str:
+    """Encode data with the stdlib encoder, writing non-finite floats as null like orjson."""
+    try:
+        return _json_encode(data)
+    except ValueError:
+        # Bare NaN/Infinity isn't valid JSON and BigQuery rejects it
+        return _json_encode(_finite(data))
+
+
+def _dumps(data: Any) -> str:
+    """Encode data as compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=str, option=_ORJSON_OPTIONS).decode()
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder handles them
+    return _encode_json(data)
+
+
+def _ndjson(entries: List[Dict[str, Any]]) -> bytes:
+    """Encode entries as newline-delimited JSON, joining orjson's bytes directly when installed."""
+    if orjson is not None:
+        option = _ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+        try:
+            return b"".join([orjson.dumps(entry, default=str, option=option) for entry in entries])
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder handles them
+    return "".join([_encode_json(entry) + "\n" for entry in entries]).encode()
+
+
+def _text_bytes(entries: List[Dict[str, Any]]) -> int:
+    """Size of the entries' instruction/reference text, as counted against buffer_bytes."""
+    return sum([len(entry["instruction"]) + len(entry["reference"]) for entry in entries])
 
 
 class DatasetCollector:
-    """Collects and stores agent interactions for evaluation datasets."""
+    """Collects and stores agent interactions for evaluation datasets.
+
+    When the buffer reaches buffer_size entries or buffer_bytes of serialized
+    instruction/reference text it is swapped for an empty one and the full batch is
+    handed to a background uploader thread, so add_interaction never waits on
+    a BigQuery load job. Batches that pile up behind a running job are loaded
+    together in the next one, up to 10,000 rows and buffer_bytes of text. A partial
+    buffer is written once the uploader has been idle for flush_interval seconds,
+    and by shutdown(), which the owning EvaluationWrapper's finalizer also calls at
+    interpreter exit. If BigQuery falls far enough behind that the pending
+    batches hit a hard cap, new batches are dropped (and counted in dropped_entries)
+    instead of growing memory.
+    """
 
     def __init__(
         self,
         project_id: str,
         agent_name: str,
         storage_location: Optional[str] = None,
-        buffer_size: int = 10,
+        buffer_size: Optional[int] = 10,
+        buffer_bytes: int = 1_048_576,
+        flush_interval: Optional[float] = 30.0,
     ):
         """Initialize dataset collector.
 
@@ -28,6 +118,10 @@ class DatasetCollector:
             agent_name: Name of the agent
             storage_location: BigQuery table (project.dataset.table)
             buffer_size: Number of interactions to buffer before writing to BigQuery
+                (None sizes batches by buffer_bytes alone, up to 10,000 rows)
+            buffer_bytes: Buffered instruction/reference size that also triggers a write
+            flush_interval: Idle seconds after which a partial buffer is written (0 or
+                None disables the idle write; partial buffers then wait for flush())
         """
         self.project_id = project_id
         self.agent_name = agent_name
@@ -42,14 +136,33 @@ class DatasetCollector:
         self.bq_client = bigquery.Client(project=project_id)
 
         # Create table if it doesn't exist
+        self._table_ready = False  # Set once the table is known to exist; reset on NotFound
         self._ensure_table_exists()
 
         # In-memory buffer for batch writes
         self.buffer: List[Dict[str, Any]] = []
         self.buffer_size = buffer_size
+        self._max_rows = _MAX_BATCH_ROWS if buffer_size is None else buffer_size
+        self.buffer_bytes = buffer_bytes
+        self._buffered_bytes = 0  # Running size of the buffered instructions/references
+        # Non-positive values disable the idle write (a zero get() timeout would spin)
+        self.flush_interval = flush_interval if flush_interval and flush_interval > 0 else None
         self._retry_counts: Dict[str, int] = {}  # Track retry counts per entry
         self._max_retries = 3  # Maximum retries before discarding
 
+        # Full buffers (and flush markers) waiting for the uploader thread. A deque the
+        # collector owns, so the uploader can look at the next batch before taking it
+        self._uploads: Deque[Any] = deque()
+        self._uploads_changed = threading.Condition()  # Guards _uploads; notified on put/take
+        self._max_pending = _MAX_PENDING_BATCHES
+        self.dropped_entries = 0
+        self._dropped_lock = threading.Lock()
+        self._buffer_lock = threading.Lock()  # Guards buffer swaps against retry re-adds
+        self._upload_thread = threading.Thread(
+            target=self._upload_loop, name="dataset_upload", daemon=True
+        )
+        self._upload_thread.start()
+
     def add_interaction(
         self,
         interaction_id: str,
@@ -90,76 +203,197 @@ class DatasetCollector:
         }
 
         # Add to buffer
-        self.buffer.append(entry)
-
-        # Flush if buffer is full
-        if len(self.buffer) >= self.buffer_size:
-            self.flush()
+        with self._buffer_lock:
+            self.buffer.append(entry)
+            self._buffered_bytes += len(instruction) + len(response)
+            if len(self.buffer) < self._max_rows and self._buffered_bytes < self.buffer_bytes:
+                return
+            # Buffer is full: swap in an empty one and upload the full one in the background
+            buffer_to_write, self.buffer = self.buffer, []
+            self._buffered_bytes = 0
+        self._enqueue(buffer_to_write)
+
+    def flush(self, timeout: Optional[float] = 60.0) -> None:
+        """Write buffered interactions to storage and wait for pending uploads.
+
+        If the upload queue stays full for the whole timeout, the buffered entries
+        are kept for the next flush rather than dropped.
 
-    def flush(self) -> None:
-        """Write buffered interactions to storage using load job (supports UPDATE/DELETE)."""
-        if not self.buffer:
+        Args:
+            timeout: Max seconds to wait in total (None waits until uploads finish)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        with self._buffer_lock:
+            buffer_to_write, self.buffer = self.buffer, []
+            self._buffered_bytes = 0
+        if buffer_to_write and not self._put(buffer_to_write, remaining()):
+            with self._buffer_lock:
+                self.buffer[:0] = buffer_to_write
+                self._buffered_bytes += _text_bytes(buffer_to_write)
             return
 
-        # Save current buffer and clear it immediately to avoid race conditions
-        buffer_to_write = self.buffer
-        self.buffer = []
+        # Uploads run in order, so once the marker is reached every earlier batch is done
+        done = threading.Event()
+        if self._put(done, remaining()):
+            done.wait(remaining())
 
-        try:
-            # Ensure table exists before writing
-            self._ensure_table_exists()
+    def shutdown(self, timeout: Optional[float] = 60.0) -> None:
+        """Write buffered interactions, then stop the uploader thread.
 
-            # Write to temporary JSONL file
-            with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as tmp_file:
-                for entry in buffer_to_write:
-                    json.dump(entry, tmp_file)
-                    tmp_file.write("\n")
-                tmp_path = tmp_file.name
+        Args:
+            timeout: Max seconds to wait in total (None waits until uploads finish)
+        """
+        if not self._upload_thread.is_alive():
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
 
-            try:
-                # Load data using load job (not streaming, supports UPDATE/DELETE)
-                job_config = bigquery.LoadJobConfig(
-                    source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
-                    write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
-                    schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
-                )
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
 
-                with open(tmp_path, "rb") as source_file:
-                    load_job = self.bq_client.load_table_from_file(
-                        source_file, self.storage_location, job_config=job_config
-                    )
+        self.flush(timeout)
+        if self._put(_STOP, remaining()):
+            self._upload_thread.join(remaining())
 
-                # Wait for job to complete (with timeout)
-                load_job.result(timeout=60)
+    def _put(self, item: Any, timeout: Optional[float]) -> bool:
+        """Queue an item for the uploader, waiting up to timeout for room.
 
-                if load_job.errors:
-                    print(f"Warning: Errors loading data to BigQuery: {load_job.errors}")
+        Returns:
+            False if the pending-batch cap was still reached when the timeout ran out
+        """
+        with self._uploads_changed:
+            if not self._uploads_changed.wait_for(
+                lambda: len(self._uploads) < self._max_pending, timeout
+            ):
+                return False
+            self._uploads.append(item)
+            self._uploads_changed.notify_all()
+        return True
+
+    def _enqueue(self, batch: List[Dict[str, Any]]) -> None:
+        """Hand a full buffer to the uploader, dropping it if the pending-batch cap is reached."""
+        with self._uploads_changed:
+            if len(self._uploads) < self._max_pending:
+                self._uploads.append(batch)
+                self._uploads_changed.notify_all()
+                return
+        # Several agent threads can overflow at once; += isn't atomic
+        with self._dropped_lock:
+            self.dropped_entries += len(batch)
+        warn("Dropped %d dataset entries (upload queue full)", len(batch))
+
+    def _upload_loop(self) -> None:
+        uploads, changed = self._uploads, self._uploads_changed
+        while True:
+            with changed:
+                if changed.wait_for(lambda: uploads, self.flush_interval):
+                    job = uploads.popleft()
+                    changed.notify_all()
                 else:
-                    # Successfully loaded data
-                    num_rows = len(buffer_to_write)
-                    print(
-                        f"✅ Wrote {num_rows} interaction(s) to "
-                        f"BigQuery table: {self.storage_location}"
-                    )
-
-            finally:
-                # Clean up temp file
-                Path(tmp_path).unlink(missing_ok=True)
+                    job = None
+            if job is None:
+                # Idle: write the partial buffer rather than holding it indefinitely
+                with self._buffer_lock:
+                    job, self.buffer = self.buffer, []
+                    self._buffered_bytes = 0
+                if not job:
+                    continue
+            if job is _STOP:
+                return
+            if isinstance(job, threading.Event):
+                job.set()
+                continue
+            marker = self._merge_queued(job)
+            self._write_batch(job)
+            if marker is not None:
+                marker.set()
+
+    def _merge_queued(self, job: List[Dict[str, Any]]) -> Optional[threading.Event]:
+        """Extend job with batches that queued up while the previous load job ran.
+
+        Merging keeps busy agents well under BigQuery's daily load-job quota per table.
+        A job grows to at most 10,000 rows and buffer_bytes of text; batches that would
+        push it past either limit stay queued for the next job.
+
+        Returns:
+            The flush marker that ended the merge, if any (batches after it wait)
+        """
+        pending = self._uploads
+        rows, size = len(job), _text_bytes(job)
+        marker = None
+        taken = False
+        # Peek under the lock, so a batch that doesn't fit is never taken
+        with self._uploads_changed:
+            while pending:
+                queued = pending[0]
+                if queued is _STOP:
+                    break
+                if isinstance(queued, threading.Event):
+                    marker = pending.popleft()
+                    taken = True
+                    break
+                queued_size = _text_bytes(queued)
+                if rows + len(queued) > _MAX_BATCH_ROWS or size + queued_size > self.buffer_bytes:
+                    break
+                job.extend(pending.popleft())
+                taken = True
+                rows += len(queued)
+                size += queued_size
+            if taken:
+                self._uploads_changed.notify_all()  # Room for producers waiting on the cap
+        return marker
+
+    def _write_batch(self, buffer_to_write: List[Dict[str, Any]]) -> None:
+        """Write one batch using a load job (supports UPDATE/DELETE)."""
+        try:
+            # Ensure table exists before writing; checked again only if a write finds it gone
+            if not self._table_ready:
+                self._ensure_table_exists()
+
+            # Newline-delimited JSON built in memory; no temp file round trip
+            source_file = io.BytesIO(_ndjson(buffer_to_write))
+
+            # Load data using load job (not streaming, supports UPDATE/DELETE)
+            job_config = bigquery.LoadJobConfig(
+                source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+                write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+                schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+            )
+            load_job = self.bq_client.load_table_from_file(
+                source_file, self.storage_location, job_config=job_config
+            )
+
+            # Wait for job to complete (with timeout)
+            load_job.result(timeout=_UPLOAD_TIMEOUT)
+
+            if load_job.errors:
+                warn("Errors loading data to BigQuery: %s", load_job.errors)
+            else:
+                # Successfully loaded data
+                num_rows = len(buffer_to_write)
+                print(
+                    f"✅ Wrote {num_rows} interaction(s) to "
+                    f"BigQuery table: {self.storage_location}"
+                )
 
         except Exception as e:
-            print(f"Warning: Failed to write dataset entries: {e}")
+            warn("Failed to write dataset entries: %s", e)
+            if isinstance(e, NotFound):
+                self._table_ready = False  # The table (or dataset) was deleted
             # Re-add failed entries to buffer for retry (with retry limit)
             for entry in buffer_to_write:
                 entry_id = entry.get("interaction_id", str(id(entry)))
                 retry_count = self._retry_counts.get(entry_id, 0)
                 if retry_count < self._max_retries:
                     self._retry_counts[entry_id] = retry_count + 1
-                    self.buffer.append(entry)
+                    with self._buffer_lock:
+                        self.buffer.append(entry)
+                        self._buffered_bytes += _text_bytes([entry])
                 else:
-                    print(
-                        f"Warning: Discarding entry {entry_id} "
-                        f"after {self._max_retries} failed retries"
-                    )
+                    warn("Discarding entry %s after %d failed retries", entry_id, self._max_retries)
 
     def _ensure_table_exists(self) -> None:
         """Create BigQuery table for test dataset if it doesn't exist."""
@@ -210,12 +444,15 @@ class DatasetCollector:
         if not table_exists:
             try:
                 self.bq_client.create_table(table, exists_ok=True)
+                table_exists = True
                 print(f"Created BigQuery table: {self.storage_location}")
             except Exception:
                 pass  # Table might have been created by another process
 
+        self._table_ready = table_exists
+
     def _serialize(self, data: Any) -> str:
         """Serialize data to JSON string."""
         if isinstance(data, str):
             return data
-        return json.dumps(data, default=str)
+        return _dumps(data)
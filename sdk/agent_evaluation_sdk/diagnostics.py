@@ -0,0 +1,57 @@
+"""
+Rate-limited warnings for the SDK's background export paths.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List
+
+_WARNINGS_PER_SECOND = 10.0  # Sustained rate allowed per message template
+_WARNING_BURST = 10  # Messages a template may emit at once before being limited
+
+
+class _RateLimitFilter(logging.Filter):
+    """Token bucket per message template, so a flapping backend can't flood the output.
+
+    Templates (the unformatted ``record.msg``) are limited independently: a burst of
+    export failures does not hide an unrelated warning.
+    """
+
+    def __init__(self, rate: float = _WARNINGS_PER_SECOND, burst: int = _WARNING_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, List[float]] = {}  # template -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.msg)
+            if bucket is None:
+                bucket = self._buckets[record.msg] = [float(self.burst), now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                return False
+            bucket[0] = tokens - 1
+            return True
+
+
+logger = logging.getLogger("agent_evaluation_sdk")
+logger.addFilter(_RateLimitFilter())
+
+
+def warn(message: str, *args: object) -> None:
+    """Log a rate-limited SDK warning.
+
+    Pass values as ``args`` (%-style) rather than formatting them into
+    ``message``, so repeats of the same warning share one rate limit.
+
+    Args:
+        message: Warning template, e.g. "Failed to send metrics: %s"
+        *args: Values for the template
+    """
+    logger.warning(message, *args)
@@ -2,6 +2,7 @@
 Gen AI Evaluation Service integration.
 """
 
+import functools
 from typing import Any, Dict, List, Optional
 
 from google.cloud import aiplatform
@@ -30,6 +31,18 @@ class GenAIEvaluator:
         # Initialize Vertex AI
         aiplatform.init(project=project_id, location=location)
 
+    def prewarm(self) -> None:
+        """Import the evaluation stack ahead of the first evaluation.
+
+        pandas and vertexai.preview.evaluation take seconds to import cold;
+        calling this in the background lets that overlap with other work.
+        """
+        try:
+            import pandas  # noqa: F401
+            from vertexai.preview.evaluation import EvalTask  # noqa: F401
+        except ImportError:
+            pass  # Reported when evaluation actually runs
+
     def _evaluate(
         self,
         dataset: List[Dict[str, Any]],
@@ -553,3 +566,22 @@ class GenAIEvaluator:
             print(f"   ⚠️  Tool errors: {interactions_with_errors}")
 
         return stats
+
+
+@functools.lru_cache(maxsize=4)
+def get_evaluator(
+    project_id: str,
+    location: str = "us-central1",
+    model_name: str = "gemini-2.5-flash",
+) -> GenAIEvaluator:
+    """Get a shared evaluator, initializing Vertex AI only once per project.
+
+    Args:
+        project_id: GCP project ID
+        location: GCP region
+        model_name: Model to use for model-based evaluation
+
+    Returns:
+        Cached GenAIEvaluator instance
+    """
+    return GenAIEvaluator(project_id=project_id, location=location, model_name=model_name)
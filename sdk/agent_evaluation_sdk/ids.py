@@ -0,0 +1,44 @@
+"""
+Random ids for interactions, traces and spans.
+"""
+
+import os
+import threading
+from collections import deque
+
+_POOL_SIZE = 256  # Random ids generated per os.urandom read
+_UUID4_VERSION = bytes((b & 0x0F) | 0x40 for b in range(256))  # byte 6 -> version 4
+_UUID4_VARIANT = bytes((b & 0x3F) | 0x80 for b in range(256))  # byte 8 -> RFC 4122
+_pool = threading.local()
+
+
+def _fill_pool() -> deque:
+    """Generate a block of uuid4 hex ids from a single os.urandom read."""
+    buf = bytearray(os.urandom(16 * _POOL_SIZE))
+    buf[6::16] = buf[6::16].translate(_UUID4_VERSION)
+    buf[8::16] = buf[8::16].translate(_UUID4_VARIANT)
+    hex_ids = buf.hex()
+    return deque([hex_ids[i : i + 32] for i in range(0, len(hex_ids), 32)])
+
+
+def next_id() -> str:
+    """Return a random uuid4 hex id (same format as ``uuid.uuid4().hex``).
+
+    Ids are drawn from a per-thread pool, so the urandom syscall and UUID
+    formatting are amortized over many calls without any locking. Span ids are
+    the first 16 characters.
+    """
+    try:
+        return _pool.ids.popleft()
+    except (AttributeError, IndexError):
+        _pool.ids = ids = _fill_pool()
+        return ids.popleft()
+
+
+def _reset_pool() -> None:
+    # A forked child inherits the parent's pooled ids; drop them so ids stay unique
+    global _pool
+    _pool = threading.local()
+
+
+os.register_at_fork(after_in_child=_reset_pool)
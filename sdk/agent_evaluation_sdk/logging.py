@@ -3,7 +3,7 @@ Cloud Logging integration for agent evaluation.
 """
 
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.cloud import logging as cloud_logging
 from google.cloud.logging_v2 import Resource
@@ -54,7 +54,36 @@ class CloudLogger:
             duration_ms: Time taken in milliseconds
             metadata: Additional metadata (model, tokens, etc.)
         """
-        log_entry = {
+        self.logger.log_struct(
+            self._interaction_entry(interaction_id, input_data, output_data, duration_ms, metadata),
+            resource=self.resource,
+            severity="INFO",
+        )
+
+    def log_interactions(self, interactions: List[Tuple[str, Any, Any, float, Any]]) -> None:
+        """Log several interactions in a single Cloud Logging write.
+
+        Args:
+            interactions: Tuples of (interaction_id, input_data, output_data,
+                duration_ms, metadata) as accepted by log_interaction
+        """
+        with self.logger.batch() as batch:
+            for interaction in interactions:
+                batch.log_struct(
+                    self._interaction_entry(*interaction),
+                    resource=self.resource,
+                    severity="INFO",
+                )
+
+    def _interaction_entry(
+        self,
+        interaction_id: str,
+        input_data: Any,
+        output_data: Any,
+        duration_ms: float,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        return {
             "interaction_id": interaction_id,
             "agent_name": self.agent_name,
             "timestamp": time.time(),
@@ -64,12 +93,6 @@ class CloudLogger:
             "metadata": metadata or {},
         }
 
-        self.logger.log_struct(
-            log_entry,
-            resource=self.resource,
-            severity="INFO",
-        )
-
     def log_tool_call(
         self,
         interaction_id: str,
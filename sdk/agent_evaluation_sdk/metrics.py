@@ -3,14 +3,21 @@ Cloud Monitoring integration for agent evaluation.
 """
 
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.api import metric_pb2 as ga_metric
 from google.cloud import monitoring_v3
 
+from agent_evaluation_sdk.diagnostics import warn
+
 
 class CloudMetrics:
-    """Wrapper for Cloud Monitoring to track agent metrics."""
+    """Wrapper for Cloud Monitoring to track agent metrics.
+
+    Each metric is written at most once per write interval. Values recorded in
+    between are coalesced into the next written point (a mean for latency, a sum
+    for counts) rather than dropped.
+    """
 
     def __init__(self, project_id: str, agent_name: str):
         """Initialize Cloud Metrics.
@@ -30,11 +37,13 @@ class CloudMetrics:
         self.metric_prefix = "custom.googleapis.com/agent"
 
         # Track last write time per metric to avoid sampling rate errors
-        self._last_write_time: Dict[str, float] = {}
+        self._last_write_time: Dict[Tuple[str, tuple], float] = {}
         self._min_write_interval = 60.0  # Minimum 60 seconds between writes for same metric
+        # [total, count] of values recorded since the metric's last successful write
+        self._pending: Dict[Tuple[str, tuple], List[Any]] = {}
 
     def record_latency(self, duration_ms: float, labels: Optional[Dict[str, str]] = None) -> None:
-        """Record agent response latency.
+        """Record agent response latency (written as the mean since the last point).
 
         Args:
             duration_ms: Duration in milliseconds
@@ -46,6 +55,7 @@ class CloudMetrics:
             labels=labels or {},
             value_type=ga_metric.MetricDescriptor.ValueType.DOUBLE,
             metric_kind=ga_metric.MetricDescriptor.MetricKind.GAUGE,
+            aggregate="mean",
         )
 
     def record_token_count(
@@ -54,7 +64,7 @@ class CloudMetrics:
         output_tokens: int,
         labels: Optional[Dict[str, str]] = None,
     ) -> None:
-        """Record token usage for the interaction.
+        """Record token usage for the interaction (summed since the last point).
 
         Args:
             input_tokens: Number of input tokens
@@ -70,6 +80,7 @@ class CloudMetrics:
             labels={**base_labels, "type": "input"},
             value_type=ga_metric.MetricDescriptor.ValueType.INT64,
             metric_kind=ga_metric.MetricDescriptor.MetricKind.GAUGE,
+            aggregate="sum",
         )
 
         # Record output tokens
@@ -79,10 +90,11 @@ class CloudMetrics:
             labels={**base_labels, "type": "output"},
             value_type=ga_metric.MetricDescriptor.ValueType.INT64,
             metric_kind=ga_metric.MetricDescriptor.MetricKind.GAUGE,
+            aggregate="sum",
         )
 
     def record_error(self, error_type: str, labels: Optional[Dict[str, str]] = None) -> None:
-        """Record an error occurrence.
+        """Record an error occurrence (counted since the last point).
 
         Args:
             error_type: Type/category of error
@@ -94,10 +106,11 @@ class CloudMetrics:
             labels={**(labels or {}), "error_type": error_type},
             value_type=ga_metric.MetricDescriptor.ValueType.INT64,
             metric_kind=ga_metric.MetricDescriptor.MetricKind.GAUGE,
+            aggregate="sum",
         )
 
     def record_success(self, labels: Optional[Dict[str, str]] = None) -> None:
-        """Record a successful interaction.
+        """Record a successful interaction (counted since the last point).
 
         Args:
             labels: Additional labels for the metric
@@ -108,6 +121,22 @@ class CloudMetrics:
             labels=labels or {},
             value_type=ga_metric.MetricDescriptor.ValueType.INT64,
             metric_kind=ga_metric.MetricDescriptor.MetricKind.GAUGE,
+            aggregate="sum",
+        )
+
+    def record_dropped_jobs(self, count: int, labels: Optional[Dict[str, str]] = None) -> None:
+        """Record how many observability jobs the SDK has dropped so far.
+
+        Args:
+            count: Total jobs dropped because the emit queue was full
+            labels: Additional labels for the metric
+        """
+        self._write_metric(
+            metric_type=f"{self.metric_prefix}/dropped_jobs",
+            value=count,
+            labels=labels or {},
+            value_type=ga_metric.MetricDescriptor.ValueType.INT64,
+            metric_kind=ga_metric.MetricDescriptor.MetricKind.GAUGE,
         )
 
     def _write_metric(
@@ -117,6 +146,7 @@ class CloudMetrics:
         labels: Dict[str, str],
         value_type: ga_metric.MetricDescriptor.ValueType,
         metric_kind: ga_metric.MetricDescriptor.MetricKind,
+        aggregate: Optional[str] = None,
     ) -> None:
         """Write a metric to Cloud Monitoring.
 
@@ -126,18 +156,28 @@ class CloudMetrics:
             labels: Metric labels
             value_type: Type of value (INT64, DOUBLE, etc.)
             metric_kind: Kind of metric (GAUGE, CUMULATIVE, etc.)
+            aggregate: How values recorded between writes are combined ("mean" or
+                "sum"); None writes the latest value only
         """
-        # Add agent name to labels
-        labels["agent_name"] = self.agent_name
-
-        # Create metric key for rate limiting
-        metric_key = f"{metric_type}:{':'.join(f'{k}={v}' for k, v in sorted(labels.items()))}"
-
-        # Check if we're writing too frequently
+        # Check if we're writing too frequently. Most calls stop here, so the key is a
+        # plain tuple (no string formatting) and agent_name, which never varies, is left out.
+        metric_key = (metric_type, tuple(sorted(labels.items())) if labels else ())
+        if aggregate:
+            pending = self._pending.get(metric_key)
+            if pending is None:
+                pending = self._pending[metric_key] = [0, 0]
+            pending[0] += value
+            pending[1] += 1
         now = time.time()
         last_write = self._last_write_time.get(metric_key, 0)
         if now - last_write < self._min_write_interval:
-            return  # Skip this write to avoid rate limit errors
+            return  # Coalesced into the next write to avoid rate limit errors
+        if aggregate:
+            total, count = self._pending[metric_key]
+            value = total / count if aggregate == "mean" else total
+
+        # Add agent name to labels
+        labels["agent_name"] = self.agent_name
 
         # Create time series
         series = monitoring_v3.TimeSeries()
@@ -171,6 +211,7 @@ class CloudMetrics:
         try:
             self.client.create_time_series(name=self.project_name, time_series=[series])
             self._last_write_time[metric_key] = now
+            self._pending.pop(metric_key, None)
         except Exception as e:
             # Silently ignore rate limit errors, warn on others
             # Check for InvalidArgument with rate limit message
@@ -180,4 +221,4 @@ class CloudMetrics:
                 e, api_exceptions.InvalidArgument
             ) and "more frequently than the maximum sampling period" in str(e)
             if not is_rate_limit:
-                print(f"Warning: Failed to write metric: {e}")
+                warn("Failed to write metric: %s", e)
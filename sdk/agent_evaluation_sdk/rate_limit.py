@@ -0,0 +1,40 @@
+"""
+Client-side rate limiting for agent calls.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Thread-safe token bucket that paces calls to a requests-per-minute budget."""
+
+    def __init__(self, rpm: int = 60, burst: Optional[int] = None):
+        """Initialize rate limiter.
+
+        Args:
+            rpm: Sustained requests per minute
+            burst: Max requests allowed back-to-back (default: rpm)
+        """
+        if rpm <= 0:
+            raise ValueError("rpm must be positive")
+
+        self.rate = rpm / 60.0  # Tokens per second
+        self.capacity = float(burst if burst is not None else rpm)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
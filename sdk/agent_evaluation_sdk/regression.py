@@ -4,13 +4,70 @@ Regression testing utilities
 Runs the agent on a test dataset and evaluates performance.
 """
 
+import asyncio
+import contextlib
+import json
+import queue
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from importlib.util import find_spec
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from google.cloud import bigquery
 from google.cloud.exceptions import Conflict
 
+from agent_evaluation_sdk import aio
+from agent_evaluation_sdk.diagnostics import warn
+
+# Optional: installed with the "speedups" extra. Checked without importing, since
+# pyarrow is slow to load and only fetch_test_cases needs it.
+_ARROW_DOWNLOAD = (
+    find_spec("pyarrow") is not None and find_spec("google.cloud.bigquery_storage") is not None
+)
+
+
+def _prefetch(pages: Iterable[Iterable[Any]]) -> Iterator[List[Any]]:
+    """Yield pages while the next one downloads in a background thread.
+
+    Errors raised while downloading are re-raised from the consumer's side.
+    """
+    ready: "queue.Queue[Tuple[bool, Any]]" = queue.Queue(maxsize=1)
+    stop = threading.Event()
+
+    def offer(item: Tuple[bool, Any]) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def pull() -> None:
+        try:
+            for page in pages:
+                if not offer((True, list(page))):
+                    return
+        except Exception as e:
+            offer((False, e))
+            return
+        offer((False, None))
+
+    threading.Thread(target=pull, name="test-case-prefetch", daemon=True).start()
+    try:
+        while True:
+            more, item = ready.get()
+            if not more:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        # Lets the download thread exit if the consumer stops early
+        stop.set()
+
 
 class RegressionTester:
     """Run regression tests on agent using historical test dataset."""
@@ -26,6 +83,18 @@ class RegressionTester:
         self.agent_name = self._validate_name(agent_name)
         self.bq_client = bigquery.Client(project=project_id)
 
+    def prewarm(self) -> Any:
+        """Set up the evaluator and load its libraries before they are needed.
+
+        Returns:
+            Shared GenAIEvaluator for this project
+        """
+        from agent_evaluation_sdk.evaluation import get_evaluator
+
+        evaluator = get_evaluator(self.project_id)
+        evaluator.prewarm()
+        return evaluator
+
     def _validate_name(self, name: str) -> str:
         """Validate and sanitize agent name for BigQuery table naming.
 
@@ -63,6 +132,92 @@ class RegressionTester:
         Returns:
             List of test cases with instruction, reference, and context
         """
+        print("📊 Fetching test cases...")
+        try:
+            query_job = self.bq_client.query(
+                self._test_cases_query(only_reviewed, limit, dataset_table)
+            )
+            test_cases = None
+            if _ARROW_DOWNLOAD:
+                try:
+                    test_cases = self._arrow_rows(query_job.result())
+                except Exception as e:
+                    # e.g. no bigquery.readsessions.create permission; REST still works
+                    warn("Storage Read API download failed, falling back to REST: %s", e)
+            if test_cases is None:
+                test_cases = [dict(row) for row in query_job.result()]
+            print(f"✅ Found {len(test_cases)} test cases")
+            return test_cases
+        except Exception as e:
+            print(f"❌ Error fetching test cases: {e}")
+            return []
+
+    @staticmethod
+    def _arrow_rows(results: Any) -> List[Dict[str, Any]]:
+        """Download query results as Arrow record batches and convert them to dicts.
+
+        Large results are read through the BigQuery Storage Read API in parallel
+        streams rather than paged over REST as JSON, which cuts download time; the
+        rows still end up as dicts, so peak memory is about the same. Arrow returns
+        JSON columns as strings, so the trajectory is parsed to match the REST rows.
+        """
+        rows = results.to_arrow(create_bqstorage_client=True).to_pylist()
+        for row in rows:
+            trajectory = row.get("reference_trajectory")
+            if isinstance(trajectory, str):
+                row["reference_trajectory"] = json.loads(trajectory)
+        return rows
+
+    def iter_test_cases(
+        self,
+        only_reviewed: bool = True,
+        limit: Optional[int] = None,
+        dataset_table: Optional[str] = None,
+        page_size: int = 100,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream test cases from BigQuery page by page.
+
+        Unlike fetch_test_cases, rows are yielded as soon as their page arrives, so
+        callers can start running the agent before the whole result set is downloaded.
+        The next page is fetched in a background thread while the caller works through
+        the current one, so at most three pages are held in memory at a time.
+
+        Iterating blocks while a page downloads, so async callers should pull rows
+        with asyncio.to_thread(next, test_cases, None) to keep the event loop free.
+
+        Args:
+            only_reviewed: If True, only fetch reviewed test cases
+            limit: Optional limit on number of test cases to fetch
+            dataset_table: Optional custom BigQuery table name (overrides default)
+            page_size: Number of rows fetched per page
+
+        Yields:
+            Test cases with instruction, reference, and context
+
+        Raises:
+            Exception: If fetching fails after some rows were yielded, so a truncated
+                run can't pass for a complete one (a failure before the first row
+                just ends the stream, like fetch_test_cases returning [])
+        """
+        print("📊 Fetching test cases...")
+        yielded = False
+        try:
+            results = self.bq_client.query(
+                self._test_cases_query(only_reviewed, limit, dataset_table)
+            ).result(page_size=page_size)
+            for page in _prefetch(results.pages):
+                for row in page:
+                    yielded = True
+                    yield dict(row)
+        except Exception as e:
+            print(f"❌ Error fetching test cases: {e}")
+            if yielded:
+                raise
+
+    def _test_cases_query(
+        self, only_reviewed: bool, limit: Optional[int], dataset_table: Optional[str]
+    ) -> str:
+        """Build the test case query for the dataset table."""
         # Determine table name: use custom if provided, otherwise use default naming
         if dataset_table:
             table_name = dataset_table
@@ -70,7 +225,7 @@ class RegressionTester:
             table_name = f"{self.project_id}.agent_evaluation.{self.agent_name}_eval_dataset"
 
         # Use parameterized query to prevent SQL injection
-        query = """
+        return """
             SELECT instruction, reference, context, trajectory as reference_trajectory
             FROM `{table_name}`
             {where_clause}
@@ -82,15 +237,54 @@ class RegressionTester:
             limit_clause=f"LIMIT {int(limit)}" if limit else "",
         )
 
-        print("📊 Fetching test cases...")
+    def _run_test_case(self, agent: Any, wrapper: Any, test_case: Dict[str, Any]) -> Dict[str, Any]:
+        """Run agent on a single test case.
+
+        Args:
+            agent: Agent instance (wrapped with enable_evaluation)
+            wrapper: EvaluationWrapper for trajectory access, if any
+            test_case: Test case to run
+
+        Returns:
+            Result with response and trajectory
+        """
+        instruction = test_case.get("instruction", "")
+
         try:
-            results = self.bq_client.query(query).result()
-            test_cases = [dict(row) for row in results]
-            print(f"✅ Found {len(test_cases)} test cases")
-            return test_cases
+            response = agent.generate_content(instruction)
+            try:
+                response_text = response.text
+            except AttributeError:
+                response_text = str(response)
+            error = None
+
+            # Ensure response is not empty
+            if not response_text or response_text.strip() == "":
+                response_text = "[EMPTY RESPONSE]"
+                error = "Agent returned empty response"
+
+            # Get trajectory from wrapper if available (tracked per thread)
+            trajectory = None
+            if wrapper and hasattr(wrapper, "get_last_trajectory"):
+                trajectory = wrapper.get_last_trajectory()
+
         except Exception as e:
-            print(f"❌ Error fetching test cases: {e}")
-            return []
+            print(f"   ❌ Error: {e}")
+            response_text = f"ERROR: {str(e)}"
+            error = str(e)
+            trajectory = None
+
+        return {
+            "instruction": instruction,
+            "reference": test_case.get("reference", ""),
+            "response": response_text,
+            "context": test_case.get("context"),
+            "reference_trajectory": test_case.get("reference_trajectory"),
+            "trajectory": trajectory,
+            "test_run_id": str(uuid.uuid4()),
+            "test_timestamp": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            "error": error,
+        }
 
     def run_agent_on_tests(
         self, agent: Any, test_cases: List[Dict[str, Any]]
@@ -104,57 +298,54 @@ class RegressionTester:
         Returns:
             List of results with responses and trajectories
         """
-        print(f"🤖 Running agent on {len(test_cases)} test cases...")
-        results = []
+        total = len(test_cases)
+        print(f"🤖 Running agent on {total} test cases...")
+        results: List[Dict[str, Any]] = [{}] * total
 
         # Check if agent has wrapper for trajectory access
         wrapper = getattr(agent, "_evaluation_wrapper", None)
 
-        for i, test_case in enumerate(test_cases, 1):
-            instruction = test_case.get("instruction", "")
-            reference = test_case.get("reference", "")
-            context = test_case.get("context")
-            reference_trajectory = test_case.get("reference_trajectory")
+        for i, test_case in enumerate(test_cases):
+            print(f"   [{i + 1}/{total}] Testing...")
+            results[i] = self._run_test_case(agent, wrapper, test_case)
 
-            print(f"   [{i}/{len(test_cases)}] Testing...")
+        print(f"✅ Completed {len(results)} test runs")
+        return results
 
-            try:
-                response = agent.generate_content(instruction)
-                response_text = response.text if hasattr(response, "text") else str(response)
-                error = None
+    async def arun_agent_on_tests(
+        self, agent: Any, test_cases: List[Dict[str, Any]], max_concurrency: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Run agent on test cases in worker threads and collect responses.
 
-                # Ensure response is not empty
-                if not response_text or response_text.strip() == "":
-                    response_text = "[EMPTY RESPONSE]"
-                    error = "Agent returned empty response"
+        Test cases run one at a time unless max_concurrency is raised, in which
+        case the agent's generate_content must be safe to call from several
+        threads at once.
 
-                # Get trajectory from wrapper if available
-                trajectory = None
-                if wrapper and hasattr(wrapper, "get_last_trajectory"):
-                    trajectory = wrapper.get_last_trajectory()
+        Args:
+            agent: Agent instance (wrapped with enable_evaluation)
+            test_cases: List of test cases to run
+            max_concurrency: Max test cases in flight at once
 
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-                response_text = f"ERROR: {str(e)}"
-                error = str(e)
-                trajectory = None
-
-            results.append(
-                {
-                    "instruction": instruction,
-                    "reference": reference,
-                    "response": response_text,
-                    "context": context,
-                    "reference_trajectory": reference_trajectory,
-                    "trajectory": trajectory,
-                    "test_run_id": str(uuid.uuid4()),
-                    "test_timestamp": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
-                    "error": error,
-                }
-            )
+        Returns:
+            List of results with responses and trajectories, in test case order
+        """
+        total = len(test_cases)
+        print(f"🤖 Running agent on {total} test cases ({max_concurrency} at a time)...")
+
+        wrapper = getattr(agent, "_evaluation_wrapper", None)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(i: int, test_case: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                print(f"   [{i}/{total}] Testing...")
+                return await asyncio.to_thread(self._run_test_case, agent, wrapper, test_case)
+
+        results = await asyncio.gather(
+            *(run_one(i, test_case) for i, test_case in enumerate(test_cases, 1))
+        )
 
         print(f"✅ Completed {len(results)} test runs")
-        return results
+        return list(results)
 
     def save_results(self, results: List[Dict[str, Any]], test_run_name: str) -> tuple[str, str]:
         """Save test results to BigQuery.
@@ -176,7 +367,6 @@ class RegressionTester:
         print("💾 Saving responses...")
 
         # Add timestamp to each row and serialize JSON fields
-        import json
         timestamp = datetime.utcnow().isoformat()
         rows = []
         for result in results:
@@ -245,10 +435,9 @@ class RegressionTester:
         Raises:
             Exception: If saving fails
         """
-        import json
-
         print("💾 Saving metrics...")
 
+        # JSON columns are sent as encoded strings, same as in save_results
         row = {
             "test_run_name": test_run_name,
             "agent_name": self.agent_name,
@@ -264,9 +453,11 @@ class RegressionTester:
             bigquery.SchemaField("agent_name", "STRING", mode="REQUIRED"),
             bigquery.SchemaField("test_timestamp", "TIMESTAMP", mode="REQUIRED"),
             bigquery.SchemaField("dataset_size", "INTEGER", mode="NULLABLE"),
-            bigquery.SchemaField("metrics", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("criteria_scores", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("trajectory_stats", "STRING", mode="NULLABLE"),
+            # JSON columns allow field access without JSON_EXTRACT on strings. Tables created
+            # with the old STRING schema keep working; drop them to pick up the new types.
+            bigquery.SchemaField("metrics", "JSON", mode="NULLABLE"),
+            bigquery.SchemaField("criteria_scores", "JSON", mode="NULLABLE"),
+            bigquery.SchemaField("trajectory_stats", "JSON", mode="NULLABLE"),
         ]
 
         # Create table if it doesn't exist
@@ -302,10 +493,13 @@ class RegressionTester:
         metrics: Optional[List[str]] = None,
         criteria: Optional[List[str]] = None,
         thresholds: Optional[Dict[str, float]] = None,
+        max_concurrency: int = 1,
     ) -> Dict[str, Any]:
         """Run complete regression test: fetch, run, evaluate, save.
 
-        This is the main method for running regression tests.
+        This is the main method for running regression tests. From async code,
+        await arun_full_test instead; if an event loop is already running in this
+        thread (e.g. Jupyter), the test runs on a worker thread with its own loop.
 
         Args:
             agent: ADK agent instance to test
@@ -316,44 +510,112 @@ class RegressionTester:
             metrics: List of metrics to compute (e.g., ["bleu", "rouge"])
             criteria: List of criteria for evaluation
             thresholds: Optional dict of minimum scores for pass/fail
+            max_concurrency: Max test cases run against the agent at once (above 1, the
+                agent must be safe to call from several threads)
 
         Returns:
             Dictionary with test results and metadata
         """
-        from agent_evaluation_sdk.evaluation import GenAIEvaluator
+        main = self.arun_full_test(
+            agent,
+            test_run_name,
+            only_reviewed=only_reviewed,
+            limit=limit,
+            dataset_table=dataset_table,
+            metrics=metrics,
+            criteria=criteria,
+            thresholds=thresholds,
+            max_concurrency=max_concurrency,
+        )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return aio.run(main)
+        # A loop can't be nested in this thread, so give the test one of its own
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(aio.run, main).result()
+
+    async def arun_full_test(
+        self,
+        agent: Any,
+        test_run_name: str,
+        only_reviewed: bool = True,
+        limit: Optional[int] = None,
+        dataset_table: Optional[str] = None,
+        metrics: Optional[List[str]] = None,
+        criteria: Optional[List[str]] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        max_concurrency: int = 1,
+    ) -> Dict[str, Any]:
+        """Async version of run_full_test that keeps the event loop free while test cases run.
 
+        Args:
+            agent: ADK agent instance to test
+            test_run_name: Name for this test run
+            only_reviewed: If True, only use reviewed test cases
+            limit: Optional limit on number of test cases
+            dataset_table: Optional custom BigQuery table name
+            metrics: List of metrics to compute (e.g., ["bleu", "rouge"])
+            criteria: List of criteria for evaluation
+            thresholds: Optional dict of minimum scores for pass/fail
+            max_concurrency: Max test cases run against the agent at once (above 1, the
+                agent must be safe to call from several threads)
+
+        Returns:
+            Dictionary with test results and metadata
+        """
         print("=" * 70)
         print(f"🧪 Running Test: {test_run_name}")
         print("=" * 70)
 
-        # 1. Fetch test cases
-        test_cases = self.fetch_test_cases(
-            only_reviewed=only_reviewed, limit=limit, dataset_table=dataset_table
-        )
-        if not test_cases:
-            print("❌ No test cases found")
-            return {"error": "No test cases found"}
+        # Load the evaluation stack in the background while the agent runs
+        evaluator_task = asyncio.create_task(asyncio.to_thread(self.prewarm))
+        evaluating = False
+        try:
+            # 1. Fetch test cases
+            test_cases = await asyncio.to_thread(
+                self.fetch_test_cases,
+                only_reviewed=only_reviewed,
+                limit=limit,
+                dataset_table=dataset_table,
+            )
+            if not test_cases:
+                print("❌ No test cases found")
+                return {"error": "No test cases found"}
 
-        # 2. Run agent on test cases
-        results = self.run_agent_on_tests(agent, test_cases)
+            # 2. Run agent on test cases
+            results = await self.arun_agent_on_tests(agent, test_cases, max_concurrency)
 
-        # 3. Save responses to BigQuery
-        try:
-            response_table, metrics_table = self.save_results(results, test_run_name)
-        except Exception as e:
-            print(f"❌ Failed to save results: {e}")
-            return {"error": f"Failed to save results: {e}"}
+            # 3. Save responses to BigQuery
+            try:
+                response_table, metrics_table = await asyncio.to_thread(
+                    self.save_results, results, test_run_name
+                )
+            except Exception as e:
+                print(f"❌ Failed to save results: {e}")
+                return {"error": f"Failed to save results: {e}"}
+            evaluating = True
+        finally:
+            if not evaluating:
+                # Leaving early: collect the prewarm task so its result or error isn't orphaned
+                evaluator_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await evaluator_task
 
         # 4. Evaluate responses
         print("📈 Evaluating responses...")
-        evaluator = GenAIEvaluator(project_id=self.project_id)
-        eval_results = evaluator._evaluate(
-            dataset=results, metrics=metrics, criteria=criteria, thresholds=thresholds
+        evaluator = await evaluator_task
+        eval_results = await asyncio.to_thread(
+            evaluator._evaluate,
+            dataset=results,
+            metrics=metrics,
+            criteria=criteria,
+            thresholds=thresholds,
         )
 
         # 5. Save metrics to BigQuery
         try:
-            self.save_metrics(test_run_name, eval_results, metrics_table)
+            await asyncio.to_thread(self.save_metrics, test_run_name, eval_results, metrics_table)
         except Exception as e:
             print(f"⚠️  Failed to save metrics: {e}")
 
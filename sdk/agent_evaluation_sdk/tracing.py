@@ -2,34 +2,67 @@
 Cloud Trace integration for agent evaluation.
 """
 
+import queue
+import threading
 import time
-import uuid
 from contextlib import contextmanager
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.cloud.trace_v2 import TraceServiceClient
 from google.cloud.trace_v2.types import AttributeValue, Span, TruncatableString
 from google.protobuf.timestamp_pb2 import Timestamp
 
+from agent_evaluation_sdk.diagnostics import warn
+from agent_evaluation_sdk.ids import next_id
+
+_STOP = object()  # Queue sentinel that ends the export thread
+
 
 class CloudTracer:
-    """Wrapper for Cloud Trace to track agent performance."""
+    """Wrapper for Cloud Trace to track agent performance.
+
+    Spans are queued and exported in batches from a background thread, so
+    recording a span never waits on a Cloud Trace request. Spans recorded
+    together (an interaction's root and child spans) share one queue entry.
+    """
 
-    def __init__(self, project_id: str, agent_name: str):
+    def __init__(
+        self,
+        project_id: str,
+        agent_name: str,
+        max_queue_size: int = 2048,
+        max_batch_size: int = 512,
+        schedule_delay: float = 0.5,
+    ):
         """Initialize Cloud Tracer.
 
         Args:
             project_id: GCP project ID
             agent_name: Name of the agent
+            max_queue_size: Max spans waiting for export (extra spans are dropped)
+            max_batch_size: Max spans per batch_write_spans request
+            schedule_delay: Max seconds a span waits before its batch is exported
         """
         self.project_id = project_id
         self.agent_name = agent_name
         self.client = TraceServiceClient()
         self.project_name = f"projects/{project_id}"
+        # Same on every span; converted once instead of per span
+        self._agent_name_attribute = self._to_attribute(agent_name)
+
+        self.max_batch_size = max_batch_size
+        self.schedule_delay = schedule_delay
+        self.dropped_spans = 0
+        self._dropped_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._export_thread = threading.Thread(
+            target=self._export_loop, name="cloud_trace_export", daemon=True
+        )
+        self._export_thread.start()
 
     def generate_trace_id(self) -> str:
         """Generate and return a new trace ID."""
-        return uuid.uuid4().hex
+        return next_id()
 
     def create_span_data(
         self,
@@ -54,7 +87,7 @@ class CloudTracer:
             Dictionary containing all span data for later sending
         """
         trace_id = trace_id or self.generate_trace_id()
-        span_id = uuid.uuid4().hex[:16]
+        span_id = next_id()[:16]
 
         return {
             "trace_id": trace_id,
@@ -86,7 +119,7 @@ class CloudTracer:
             Tuple of (trace_id, span_id) for creating child spans
         """
         trace_id = trace_id or self.generate_trace_id()
-        span_id = uuid.uuid4().hex[:16]  # 16-character (Google Cloud Trace requirement)
+        span_id = next_id()[:16]  # 16-character (Google Cloud Trace requirement)
         start_time = time.time()
         error_info = None
 
@@ -129,36 +162,159 @@ class CloudTracer:
             parent_span_id: Parent span ID for nested spans
         """
         try:
-            # Add agent name to attributes
-            attributes["agent_name"] = self.agent_name
-
-            # Convert timestamps
-            start_ts = self._to_timestamp(start_time)
-            end_ts = self._to_timestamp(end_time)
-
-            # Create span configuration
-            span_config = {
-                "name": f"{self.project_name}/traces/{trace_id}/spans/{span_id}",
-                "span_id": span_id,
-                "display_name": TruncatableString(value=name),
-                "start_time": start_ts,
-                "end_time": end_ts,
-                "attributes": Span.Attributes(
-                    attribute_map={k: self._to_attribute(v) for k, v in attributes.items()}
-                ),
-            }
+            # Queue span for batched export
+            self._queue.put_nowait(
+                self._build_span(
+                    trace_id, span_id, name, start_time, end_time, attributes, parent_span_id
+                )
+            )
+        except queue.Full:
+            # Several agent threads can overflow at once; += isn't atomic
+            with self._dropped_lock:
+                self.dropped_spans += 1
+        except Exception as e:
+            # Don't fail the agent if tracing fails
+            warn("Failed to send trace span: %s", e)
+
+    def _send_spans(self, spans: List[Tuple]) -> None:
+        """Send several spans as one queue entry, so they are exported together.
+
+        Args:
+            spans: Tuples of _send_span arguments, one per span
+        """
+        try:
+            self._queue.put_nowait([self._build_span(*args) for args in spans])
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped_spans += len(spans)
+        except Exception as e:
+            # Don't fail the agent if tracing fails
+            warn("Failed to send trace spans: %s", e)
+
+    def _build_span(
+        self,
+        trace_id: str,
+        span_id: str,
+        name: str,
+        start_time: float,
+        end_time: float,
+        attributes: Dict[str, Any],
+        parent_span_id: Optional[str] = None,
+    ) -> Span:
+        """Convert span fields to a Cloud Trace Span message."""
+        # Caller's dict is left untouched, so it can be a shared constant
+        attribute_map = {k: self._to_attribute(v) for k, v in attributes.items()}
+        attribute_map["agent_name"] = self._agent_name_attribute
+
+        # Create span configuration
+        span_config = {
+            "name": f"{self.project_name}/traces/{trace_id}/spans/{span_id}",
+            "span_id": span_id,
+            "display_name": TruncatableString(value=name),
+            "start_time": self._to_timestamp(start_time),
+            "end_time": self._to_timestamp(end_time),
+            "attributes": Span.Attributes(attribute_map=attribute_map),
+        }
+
+        # Add parent span ID if provided (for nested spans)
+        if parent_span_id:
+            span_config["parent_span_id"] = parent_span_id
+
+        return Span(**span_config)
+
+    def _export_loop(self) -> None:
+        """Collect queued spans into batches and export them until stopped."""
+        while True:
+            batch: List[Any] = []
+            waiters = []
+            stop = False
+            deadline = time.monotonic() + self.schedule_delay
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)  # flush() request: export what we have now
+                    break
+                if isinstance(item, list):
+                    batch.extend(item)  # _send_spans group
+                else:
+                    batch.append(item)
 
-            # Add parent span ID if provided (for nested spans)
-            if parent_span_id:
-                span_config["parent_span_id"] = parent_span_id
+            if stop:
+                # Drain everything still queued before exiting
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif isinstance(item, list):
+                        batch.extend(item)
+                    elif item is not _STOP:
+                        batch.append(item)
 
-            # Create and send span
-            span = Span(**span_config)
-            self.client.create_span(request=span)  # type: ignore[call-arg]
+            for start in range(0, len(batch), self.max_batch_size):
+                self._export(batch[start : start + self.max_batch_size])
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
 
+    def _export(self, spans: List[Any]) -> None:
+        """Write a batch of spans to Cloud Trace."""
+        if not spans:
+            return
+        try:
+            self.client.batch_write_spans(name=self.project_name, spans=spans)
         except Exception as e:
             # Don't fail the agent if tracing fails
-            print(f"Warning: Failed to send trace span: {e}")
+            warn("Failed to export %d trace spans: %s", len(spans), e)
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Export all spans queued so far.
+
+        Args:
+            timeout: Max seconds to wait for the export
+        """
+        if not self._export_thread.is_alive():
+            return
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            # The queue is bounded; don't wait past the timeout for room behind a slow export
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(max(0.0, deadline - time.monotonic()))
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Export remaining spans and stop the export thread.
+
+        Args:
+            timeout: Max seconds to wait for the export
+        """
+        if not self._export_thread.is_alive():
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._export_thread.join(max(0.0, deadline - time.monotonic()))
+        if self.dropped_spans:
+            warn("Dropped %d trace spans (export queue full)", self.dropped_spans)
 
     def _to_timestamp(self, time_float: float) -> Timestamp:
         """Convert float timestamp to Protobuf Timestamp with nanosecond precision."""
@@ -2,6 +2,8 @@
 Unit tests for configuration management.
 """
 
+from unittest.mock import Mock
+
 import pytest
 import yaml
 
@@ -66,6 +68,43 @@ class TestEvaluationConfig:
         assert config.tracing.enabled is False
         assert config.dataset.auto_collect is False
 
+    def test_from_yaml_cache(self, tmp_path):
+        """Test that cached YAML loads are isolated and invalidated on edits."""
+        import os
+
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text("genai_eval:\n  metrics: [bleu]\nlogging:\n  level: WARNING\n")
+
+        first = EvaluationConfig.from_yaml(config_file)
+        first.genai_eval.metrics.append("rouge")
+        assert EvaluationConfig.from_yaml(config_file).genai_eval.metrics == ["bleu"]
+
+        # Same mtime, different content: size still invalidates the entry
+        stat = config_file.stat()
+        config_file.write_text("logging:\n  level: DEBUG\n")
+        os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert EvaluationConfig.from_yaml(config_file).logging.level == "DEBUG"
+
+    def test_from_yaml_reuses_parse(self, tmp_path, monkeypatch):
+        """Test that loading an unchanged file again skips the YAML parse."""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text("logging:\n  level: WARNING\n")
+        EvaluationConfig.from_yaml(config_file)
+
+        monkeypatch.setattr(yaml, "load", Mock(side_effect=AssertionError("re-parsed")))
+        config = EvaluationConfig.from_yaml(config_file)
+
+        assert config.logging.level == "WARNING"
+
+    def test_from_yaml_decodes_utf8(self, tmp_path):
+        """Test that the binary-mode read decodes UTF-8 regardless of locale."""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_bytes("agent_name: café-agent\n".encode("utf-8"))
+
+        config = EvaluationConfig.from_yaml(config_file)
+
+        assert config.agent_name == "café-agent"
+
 
 class TestSubConfigs:
     """Tests for sub-configuration classes."""
@@ -83,6 +122,7 @@ class TestSubConfigs:
         config = TracingConfig()
 
         assert config.enabled is True
+        assert config.sample_rate == 1.0
 
     def test_metrics_config_defaults(self):
         """Test MetricsConfig default values."""
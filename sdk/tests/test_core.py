@@ -2,12 +2,18 @@
 Unit tests for core evaluation wrapper functionality.
 """
 
+from types import SimpleNamespace
 from unittest.mock import Mock, patch
 
 import pytest
 
 from agent_evaluation_sdk.config import EvaluationConfig
-from agent_evaluation_sdk.core import EvaluationWrapper, enable_evaluation
+from agent_evaluation_sdk.core import (
+    EvaluationWrapper,
+    _trace_context,
+    clear_evaluation_cache,
+    enable_evaluation,
+)
 
 
 class TestEvaluationWrapper:
@@ -36,6 +42,25 @@ class TestEvaluationWrapper:
         # DatasetCollector should NOT be called when auto_collect is False (default)
         mock_dataset.assert_not_called()
 
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_startup_summary_respects_verbose(self, mock_metrics, mock_tracer, mock_logger, capsys):
+        """Test that the enabled-features summary is printed once and only when verbose."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+
+        # Act
+        EvaluationWrapper(agent=Mock(), config=config)
+        verbose_output = capsys.readouterr().out
+        config.verbose = False
+        EvaluationWrapper(agent=Mock(), config=config)
+
+        # Assert
+        assert verbose_output.startswith("✅ Evaluation enabled for agent: test-agent\n")
+        assert "   - Cache: Disabled\n" in verbose_output
+        assert capsys.readouterr().out == ""
+
     @patch("agent_evaluation_sdk.core.CloudLogger")
     @patch("agent_evaluation_sdk.core.CloudTracer")
     @patch("agent_evaluation_sdk.core.CloudMetrics")
@@ -54,89 +79,1678 @@ class TestEvaluationWrapper:
         # Assert - method should be replaced
         assert mock_agent.generate_content != original_generate
 
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_agent_without_methods_rejected(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that the error for an unwrappable agent lists every supported method."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
 
-class TestEnableEvaluation:
-    """Tests for enable_evaluation function."""
+        # Act / Assert
+        with pytest.raises(ValueError) as exc_info:
+            EvaluationWrapper(agent=object(), config=config)
+        assert str(exc_info.value) == (
+            "Agent must have at least one of: generate_content, stream_content, run_async,"
+            " run, or invoke"
+        )
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_wrapped_method_has_no_wrapped_chain(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that agent method wrappers copy the name but no __wrapped__ reference."""
 
-    @patch("agent_evaluation_sdk.core.EvaluationWrapper")
-    def test_enable_evaluation_basic(self, mock_wrapper_class):
-        """Test basic enable_evaluation call."""
         # Arrange
-        mock_agent = Mock()
-        mock_wrapper = Mock()
-        mock_wrapper_class.return_value = mock_wrapper
+        class Agent:
+            def generate_content(self, prompt):
+                """Answer the prompt."""
+                return prompt
+
+        agent = Agent()
+        config = EvaluationConfig.default("test-project", "test-agent")
 
         # Act
-        result = enable_evaluation(
-            agent=mock_agent, project_id="test-project", agent_name="test-agent"
-        )
+        EvaluationWrapper(agent=agent, config=config)
 
         # Assert
-        assert result == mock_wrapper
-        mock_wrapper_class.assert_called_once()
+        assert agent.generate_content.__qualname__ == Agent.generate_content.__qualname__
+        assert agent.generate_content.__doc__ == "Answer the prompt."
+        assert not hasattr(agent.generate_content, "__wrapped__")
 
-    @patch("agent_evaluation_sdk.core.EvaluationWrapper")
-    @patch("agent_evaluation_sdk.core.EvaluationConfig")
-    def test_enable_evaluation_with_config(self, mock_config_class, mock_wrapper_class):
-        """Test enable_evaluation with config file."""
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_streaming_method_logs_accumulated_text(
+        self, mock_dataset, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test that streamed chunks pass through and are logged as one response."""
+
+        # Arrange
+        class StreamingAgent:
+            def generate_content(self, prompt):
+                return "full response"
+
+            def stream_content(self, prompt):
+                yield "Hello, "
+                yield "world"
+
+        agent = StreamingAgent()
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=agent, config=config)
+        wrapper._submit_observability = Mock()
+
+        # Act
+        chunks = list(agent.stream_content("Hi"))
+
+        # Assert
+        assert chunks == ["Hello, ", "world"]
+        args = wrapper._submit_observability.call_args.args
+        assert args[3] == "Hi"
+        assert args[4] == "Hello, world"
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_interaction_logs_sent_in_batches(
+        self, mock_dataset, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test that interaction logs are written by the background emitter in batches."""
         # Arrange
         mock_agent = Mock()
-        mock_config = Mock()
-        mock_config_class.from_yaml.return_value = mock_config
+        mock_agent.generate_content = Mock(return_value="test response")
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
 
         # Act
-        enable_evaluation(
-            agent=mock_agent,
-            project_id="test-project",
-            agent_name="test-agent",
-            config_path="test_config.yaml",
-        )
+        mock_agent.generate_content("first")
+        mock_agent.generate_content("second")
+        wrapper.flush(timeout=5)
 
         # Assert
-        mock_config_class.from_yaml.assert_called_once()
+        logger = mock_logger.return_value
+        logged = [
+            args[1] for call in logger.log_interactions.call_args_list for args in call.args[0]
+        ]
+        assert logged == ["first", "second"]
+        logger.log_interaction.assert_not_called()
 
+    @patch.dict("os.environ", {"AE_LOG_BATCH_SIZE": "abc", "AE_LOG_BATCH_MS": "nan"})
+    @patch("agent_evaluation_sdk.core.threading.Thread")
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_invalid_log_batch_env_falls_back_to_defaults(
+        self, mock_metrics, mock_tracer, mock_logger, mock_thread
+    ):
+        """Test that a malformed AE_LOG_BATCH_* value doesn't stop the agent from starting."""
+        # Arrange
+        mock_agent = Mock()
+        mock_agent.generate_content = Mock(return_value="test response")
+        config = EvaluationConfig.default("test-project", "test-agent")
 
-class TestExtractMethods:
-    """Tests for output and metadata extraction methods."""
+        # Act
+        EvaluationWrapper(agent=mock_agent, config=config)
+
+        # Assert
+        emitter_args = mock_thread.call_args.kwargs["args"]
+        assert emitter_args[3:] == (50, 0.05)
 
+    @patch.dict("os.environ", {"AE_LOG_BATCH_SIZE": "2", "AE_LOG_BATCH_MS": "60000"})
     @patch("agent_evaluation_sdk.core.CloudLogger")
     @patch("agent_evaluation_sdk.core.CloudTracer")
     @patch("agent_evaluation_sdk.core.CloudMetrics")
     @patch("agent_evaluation_sdk.core.DatasetCollector")
-    def test_extract_output_string(self, mock_dataset, mock_metrics, mock_tracer, mock_logger):
-        """Test extracting output from string response."""
+    def test_interaction_logs_written_when_batch_fills(
+        self, mock_dataset, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test that a full log batch is written without waiting for a flush."""
+        import time
+
         # Arrange
         mock_agent = Mock()
+        mock_agent.generate_content = Mock(return_value="test response")
         config = EvaluationConfig.default("test-project", "test-agent")
-        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        EvaluationWrapper(agent=mock_agent, config=config)
+        log_interactions = mock_logger.return_value.log_interactions
 
         # Act
-        output = wrapper._extract_output("test response")
+        mock_agent.generate_content("first")
+        mock_agent.generate_content("second")
+        deadline = time.monotonic() + 5
+        while not log_interactions.called and time.monotonic() < deadline:
+            time.sleep(0.01)
 
         # Assert
-        assert output == "test response"
+        log_interactions.assert_called_once()
+        assert [entry[1] for entry in log_interactions.call_args.args[0]] == ["first", "second"]
 
+    @patch("agent_evaluation_sdk.core._EMIT_QUEUE_SIZE", 1)
     @patch("agent_evaluation_sdk.core.CloudLogger")
     @patch("agent_evaluation_sdk.core.CloudTracer")
     @patch("agent_evaluation_sdk.core.CloudMetrics")
     @patch("agent_evaluation_sdk.core.DatasetCollector")
-    def test_extract_output_with_text_attribute(
+    def test_jobs_dropped_when_emit_queue_full(
         self, mock_dataset, mock_metrics, mock_tracer, mock_logger
     ):
-        """Test extracting output from response with .text attribute."""
+        """Test that submits never block the caller when the emitter falls behind."""
+        import threading
+
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=Mock(), config=config)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_job():
+            started.set()
+            release.wait(5)
+
+        wrapper._safe_submit(None, [(slow_job, ())])
+        started.wait(5)
+        queued_job = Mock()
+
+        # Act
+        wrapper._safe_submit(None, [(queued_job, ())])
+        wrapper._safe_submit(None, [(Mock(), ())])
+        release.set()
+        wrapper.flush(timeout=5)
+
+        # Assert
+        assert wrapper.dropped_jobs == 1
+        queued_job.assert_called_once()
+
+    def test_drain_takes_queued_jobs_and_wakes_producers(self):
+        """Test that draining the emit queue respects the limit and unblocks full-queue puts."""
+        import queue
+        import threading
+
+        from agent_evaluation_sdk.core import _drain
+
+        # Arrange
+        emit_queue = queue.Queue(maxsize=3)
+        for job in ("a", "b", "c"):
+            emit_queue.put(job)
+        producer = threading.Thread(target=emit_queue.put, args=("d",))
+        producer.start()
+        items = ["first"]
+
+        # Act
+        _drain(emit_queue, items, 3)
+        producer.join(5)
+
+        # Assert
+        assert items == ["first", "a", "b"]
+        assert not producer.is_alive()
+        assert [emit_queue.get_nowait() for _ in range(2)] == ["c", "d"]
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_dropped_jobs_reported_as_metric(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that the running dropped-job count is written with the interaction metrics."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=Mock(), config=config)
+        record_dropped_jobs = mock_metrics.return_value.record_dropped_jobs
+
+        # Act
+        wrapper._send_metrics(12.5, {}, False)
+        wrapper.dropped_jobs = 3
+        wrapper._send_metrics(12.5, {}, False)
+
+        # Assert
+        record_dropped_jobs.assert_called_once_with(3)
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_collected_wrapper_flushes_with_bounded_timeout(
+        self, mock_dataset, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test that a collected wrapper stops its emitter and flushes with a short timeout."""
+        import gc
+
         # Arrange
         mock_agent = Mock()
         config = EvaluationConfig.default("test-project", "test-agent")
         wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        emit_thread = wrapper._emit_thread
 
-        mock_response = Mock()
-        mock_response.text = "test response"
+        # Act
+        del wrapper, mock_agent
+        gc.collect()
+        emit_thread.join(timeout=5)
+
+        # Assert
+        assert not emit_thread.is_alive()
+        mock_tracer.return_value.shutdown.assert_called_once_with(2.0)
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_tool_trace_noop_when_nothing_recorded(self, mock_dataset, mock_metrics, mock_logger):
+        """Test that tool_trace returns the tool unchanged with tracing and trajectories off."""
+        # Arrange
+        mock_agent = Mock()
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.tracing.enabled = False
+        config.logging.include_trajectories = False
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+
+        def search_tool(query: str) -> str:
+            return query
+
+        # Act / Assert
+        assert wrapper.tool_trace("search")(search_tool) is search_tool
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_tool_span_and_trajectory_share_end_time(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that a traced tool's span end and trajectory timestamp come from one clock read."""
+        # Arrange
+        mock_agent = Mock()
+        generate = mock_agent.generate_content = Mock()
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        wrapper._submit_observability = Mock()
+        search = wrapper.tool_trace("search")(lambda query: query)
+        generate.side_effect = search
 
         # Act
-        output = wrapper._extract_output(mock_response)
+        mock_agent.generate_content("Hi")
 
         # Assert
-        assert output == "test response"
+        [(tool_name, start, end, error)] = wrapper._submit_observability.call_args.kwargs[
+            "tool_spans"
+        ]
+        [entry] = wrapper.get_last_trajectory()
+        assert (tool_name, error) == ("search", None)
+        assert start <= end == entry["timestamp"]
+
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_metrics_only_config_extracts_token_usage(self, mock_metrics, mock_tracer):
+        """Test that only token counts are extracted when no log or dataset row needs metadata."""
+        # Arrange
+        mock_agent = Mock()
+        response = {"output": "hi", "model": "gemini", "metadata": {"input_tokens": 3}}
+        mock_agent.generate_content = Mock(return_value=response)
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.logging.enabled = False
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        wrapper._submit_observability = Mock()
+
+        # Act
+        mock_agent.generate_content("Hi")
+
+        # Assert
+        metadata = wrapper._submit_observability.call_args.args[6]
+        assert metadata == {"input_tokens": 3}
+
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_submitter_queues_only_enabled_sinks(self, mock_metrics):
+        """Test that each call queues one job holding sends for the enabled sinks only."""
+        # Arrange
+        mock_agent = Mock()
+        mock_agent.generate_content = Mock(return_value="test response")
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.logging.enabled = False
+        config.tracing.enabled = False
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        queued = []
+        wrapper._emit_queue.put_nowait = queued.append
+
+        # Act
+        mock_agent.generate_content("Hi")
+
+        # Assert
+        [(log_entry, sends)] = queued
+        assert log_entry is None
+        assert [send for send, _ in sends] == [wrapper._send_metrics]
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_tracing_disabled_skips_trace_context(self, mock_metrics, mock_logger):
+        """Test that untraced calls never generate ids for or set the trace context."""
+        # Arrange
+        mock_agent = Mock()
+        mock_agent.generate_content = Mock(return_value="test response")
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.tracing.enabled = False
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        wrapper._submit_observability = Mock()
+
+        # Act
+        mock_agent.generate_content("Hi")
+
+        # Assert
+        trace_id, parent_span_id = wrapper._submit_observability.call_args.args[:2]
+        assert (trace_id, parent_span_id) == (None, None)
+        assert _trace_context.get() is None
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_traced_call_ids_drawn_from_pool(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that traced calls get trace and span ids without calling into the tracer."""
+        # Arrange
+        mock_agent = Mock()
+        mock_agent.generate_content = Mock(return_value="test response")
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        wrapper._submit_observability = Mock()
+
+        # Act
+        mock_agent.generate_content("Hi")
+
+        # Assert
+        trace_id, parent_span_id = wrapper._submit_observability.call_args.args[:2]
+        assert len(trace_id) == 32 and len(parent_span_id) == 16
+        int(trace_id + parent_span_id, 16)
+        mock_tracer.return_value.generate_trace_id.assert_not_called()
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_nested_agent_call_joins_outer_trace(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that an agent called from inside another agent's call becomes its child span."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        inner_agent = Mock()
+        inner_agent.generate_content = Mock(return_value="inner response")
+        inner = EvaluationWrapper(agent=inner_agent, config=config)
+        inner._submit_observability = Mock()
+        outer_agent = Mock()
+        outer_agent.generate_content = Mock(side_effect=inner_agent.generate_content)
+        outer = EvaluationWrapper(agent=outer_agent, config=config)
+        outer._submit_observability = Mock()
+
+        # Act
+        outer_agent.generate_content("Hi")
+
+        # Assert
+        outer_call = outer._submit_observability.call_args
+        inner_call = inner._submit_observability.call_args
+        assert inner_call.args[0] == outer_call.args[0]
+        assert inner_call.kwargs["outer_span_id"] == outer_call.args[1]
+        assert inner_call.args[1] != outer_call.args[1]
+        assert outer_call.kwargs["outer_span_id"] is None
+        assert _trace_context.get() is None
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_concurrent_tasks_keep_separate_trajectories(
+        self, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test that tool calls from interleaved asyncio tasks land in their own trajectory."""
+        import asyncio
+
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = None
+
+        class Agent:
+            async def generate_content(self, prompt):
+                await asyncio.sleep(0)
+                wrapper.tool_trace(prompt)(lambda: None)()
+                await asyncio.sleep(0)
+                return prompt
+
+        agent = Agent()
+        wrapper = EvaluationWrapper(agent=agent, config=config)
+        wrapper._submit_observability = Mock()
+
+        async def run(prompt):
+            await agent.generate_content(prompt)
+            return wrapper.get_last_trajectory()
+
+        async def run_both():
+            return await asyncio.gather(run("first"), run("second"))
+
+        # Act
+        first, second = asyncio.run(run_both())
+
+        # Assert
+        assert [entry["tool_name"] for entry in first] == ["first"]
+        assert [entry["tool_name"] for entry in second] == ["second"]
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_tool_calls_from_child_tasks_join_trajectory(
+        self, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test that tools run in tasks spawned by the agent call land in its trajectory."""
+        import asyncio
+
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = None
+
+        class Agent:
+            async def generate_content(self, prompt):
+                search = wrapper.tool_trace("search")(lambda: None)
+                await asyncio.gather(*(asyncio.to_thread(search) for _ in range(2)))
+                return prompt
+
+        agent = Agent()
+        wrapper = EvaluationWrapper(agent=agent, config=config)
+        wrapper._submit_observability = Mock()
+
+        # Act
+        asyncio.run(agent.generate_content("Hi"))
+
+        # Assert
+        trajectory = wrapper._submit_observability.call_args.kwargs["trajectory"]
+        assert [entry["tool_name"] for entry in trajectory] == ["search", "search"]
+
+    @pytest.mark.parametrize(
+        ("env_rate", "threshold"), [("abc", 1 << 32), ("1.5", 1 << 32), ("-2", 0)]
+    )
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_trace_sample_rate_env_validated_and_clamped(
+        self, mock_metrics, mock_tracer, mock_logger, env_rate, threshold
+    ):
+        """Test that a malformed AE_TRACE_SAMPLE_RATE falls back to the config and is clamped."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+
+        # Act
+        with patch.dict("os.environ", {"AE_TRACE_SAMPLE_RATE": env_rate}):
+            wrapper = EvaluationWrapper(agent=Mock(), config=config)
+
+        # Assert
+        assert wrapper._trace_threshold == threshold
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch.dict("os.environ", {"AE_TRACE_SAMPLE_RATE": "0"})
+    def test_unsampled_calls_skip_tracing(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that calls outside the trace sample get no trace ids but are still logged."""
+        # Arrange
+        mock_agent = Mock()
+        mock_agent.generate_content = Mock(return_value="test response")
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        wrapper._submit_observability = Mock()
+
+        # Act
+        mock_agent.generate_content("Hi")
+
+        # Assert
+        trace_id, parent_span_id = wrapper._submit_observability.call_args.args[:2]
+        assert (trace_id, parent_span_id) == (None, None)
+        assert wrapper._submit_observability.call_args.args[4] == "test response"
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch.dict("os.environ", {"AE_TRACE_SAMPLE_RATE": "0"})
+    def test_zero_sample_rate_skips_trace_setup(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that wrappers built with a zero sample rate never open a trace."""
+        # Arrange
+        mock_agent = Mock()
+        mock_agent.generate_content = Mock(return_value="test response")
+        config = EvaluationConfig.default("test-project", "test-agent")
+        with patch("agent_evaluation_sdk.core._open_trace") as mock_open_trace:
+            EvaluationWrapper(agent=mock_agent, config=config)
+
+            # Act
+            mock_agent.generate_content("Hi")
+
+        # Assert
+        mock_open_trace.assert_not_called()
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_trace_span_previews_non_string_input(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that span previews and lengths use the stringified prompt."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=Mock(), config=config)
+        prompt = {"messages": ["x" * 300]}
+
+        # Act
+        wrapper._send_trace_spans("t" * 32, "s" * 16, "id", prompt, "ok", 0.0, 1.0, 1.0, 1.0)
+
+        # Assert
+        attrs = mock_tracer.return_value._send_spans.call_args.args[0][0][5]
+        assert attrs["query"] == str(prompt)[:200]
+        assert attrs["input_length"] == len(str(prompt))
+        assert (attrs["response"], attrs["output_length"]) == ("ok", 2)
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_trace_spans_stringify_each_value_once(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that previews and lengths share one str() of the input and of the output."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=Mock(), config=config)
+        conversions = []
+
+        class Payload:
+            def __init__(self, name):
+                self.name = name
+
+            def __str__(self):
+                conversions.append(self.name)
+                return self.name * 300
+
+        # Act
+        wrapper._send_trace_spans(
+            "t" * 32, "s" * 16, "id", Payload("i"), Payload("o"), 0.0, 1.0, 1.0, 1.0
+        )
+
+        # Assert
+        attrs = mock_tracer.return_value._send_spans.call_args.args[0][0][5]
+        assert sorted(conversions) == ["i", "o"]
+        assert (attrs["input_length"], attrs["output_length"]) == (300, 300)
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_tool_spans_sent_with_interaction_spans(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that tool spans are exported in the agent call's span group, not one job each."""
+        # Arrange
+        mock_agent = Mock()
+        original_generate = mock_agent.generate_content = Mock()
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+        search = wrapper.tool_trace("search")(lambda query: query)
+
+        def fail(query):
+            raise ValueError("no results")
+
+        failing = wrapper.tool_trace("lookup")(fail)
+
+        def generate(prompt):
+            search(prompt)
+            with pytest.raises(ValueError):
+                failing(prompt)
+            return "done"
+
+        original_generate.side_effect = generate
+        wrapper._safe_submit = Mock()
+        wrapper._submit_observability = wrapper._build_submitter()
+
+        # Act
+        mock_agent.generate_content("Hi")
+        log_entry, sends = wrapper._safe_submit.call_args.args
+        for func, args in sends:
+            func(*args)
+
+        # Assert
+        assert wrapper._safe_submit.call_count == 1
+        spans = mock_tracer.return_value._send_spans.call_args.args[0]
+        root_span_id = spans[0][1]
+        assert [span[2] for span in spans[3:]] == ["tool.search", "tool.lookup"]
+        assert all(span[6] == root_span_id for span in spans[3:])
+        assert spans[4][5]["error.type"] == "ValueError"
+
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_context_manager_shuts_down_on_exit(self, mock_dataset, mock_tracer):
+        """Test that leaving a with-block flushes sinks and detaches the exit finalizer."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.logging.enabled = False
+        config.metrics.enabled = False
+        config.dataset.auto_collect = True
+
+        # Act
+        with EvaluationWrapper(agent=Mock(), config=config) as wrapper:
+            pass
+
+        # Assert
+        assert wrapper._shutdown_called is True
+        assert wrapper._finalizer.alive is False
+        mock_dataset.return_value.shutdown.assert_called_once()
+        mock_tracer.return_value.shutdown.assert_called_once()
+
+    def test_methods_left_unwrapped_when_nothing_recorded(self):
+        """Test that agent methods are untouched with all observability disabled."""
+        # Arrange
+        mock_agent = Mock()
+        original_generate = Mock(return_value="test response")
+        mock_agent.generate_content = original_generate
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.logging.enabled = False
+        config.logging.include_trajectories = False
+        config.tracing.enabled = False
+        config.metrics.enabled = False
+
+        # Act
+        EvaluationWrapper(agent=mock_agent, config=config)
+
+        # Assert
+        assert mock_agent.generate_content is original_generate
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    def test_methods_left_unwrapped_when_trace_sample_rate_zero(self, mock_tracer, mock_logger):
+        """Test that tracing with a zero sample rate does not keep the wrapper in place."""
+        # Arrange
+        mock_agent = Mock()
+        original_generate = Mock(return_value="test response")
+        mock_agent.generate_content = original_generate
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.logging.include_trajectories = False
+        config.tracing.sample_rate = 0.0
+        config.metrics.enabled = False
+
+        # Act
+        with patch.dict("os.environ", {}, clear=False) as env:
+            env.pop("AE_TRACE_SAMPLE_RATE", None)
+            EvaluationWrapper(agent=mock_agent, config=config)
+
+        # Assert
+        assert mock_agent.generate_content is original_generate
+
+
+class TestEnableEvaluation:
+    """Tests for enable_evaluation function."""
+
+    @patch("agent_evaluation_sdk.core.EvaluationWrapper")
+    def test_enable_evaluation_basic(self, mock_wrapper_class):
+        """Test basic enable_evaluation call."""
+        # Arrange
+        mock_agent = Mock()
+        mock_wrapper = Mock()
+        mock_wrapper_class.return_value = mock_wrapper
+
+        # Act
+        result = enable_evaluation(
+            agent=mock_agent, project_id="test-project", agent_name="test-agent"
+        )
+
+        # Assert
+        assert result == mock_wrapper
+        mock_wrapper_class.assert_called_once()
+
+    @patch("agent_evaluation_sdk.core.EvaluationWrapper")
+    def test_enable_evaluation_reuses_wrapper(self, mock_wrapper_class):
+        """Test that identical calls for the same agent return the cached wrapper."""
+        # Arrange
+        mock_agent = Mock()
+        mock_wrapper_class.side_effect = lambda agent, config: Mock(
+            agent=agent, _shutdown_called=False
+        )
+
+        # Act
+        first = enable_evaluation(mock_agent, "test-project", "test-agent")
+        second = enable_evaluation(mock_agent, "test-project", "test-agent")
+        clear_evaluation_cache()
+        third = enable_evaluation(mock_agent, "test-project", "test-agent")
+
+        # Assert
+        assert first is second
+        assert third is not first
+        assert mock_wrapper_class.call_count == 2
+
+    @patch("agent_evaluation_sdk.core.EvaluationWrapper")
+    @patch("agent_evaluation_sdk.core.EvaluationConfig")
+    def test_enable_evaluation_with_config(self, mock_config_class, mock_wrapper_class):
+        """Test enable_evaluation with config file."""
+        # Arrange
+        mock_agent = Mock()
+        mock_config = Mock()
+        mock_config_class.from_yaml.return_value = mock_config
+
+        # Act
+        enable_evaluation(
+            agent=mock_agent,
+            project_id="test-project",
+            agent_name="test-agent",
+            config_path="test_config.yaml",
+        )
+
+        # Assert
+        mock_config_class.from_yaml.assert_called_once()
+
+    @patch("agent_evaluation_sdk.core.EvaluationWrapper")
+    def test_enable_evaluation_rebuilds_wrapper_when_config_changes(
+        self, mock_wrapper_class, tmp_path
+    ):
+        """Test that editing the config file invalidates the cached wrapper."""
+        # Arrange
+        mock_agent = Mock()
+        mock_wrapper_class.side_effect = lambda agent, config: Mock(
+            agent=agent, config=config, _shutdown_called=False
+        )
+        config_path = tmp_path / "eval_config.yaml"
+        config_path.write_text("verbose: true\n")
+
+        # Act
+        first = enable_evaluation(mock_agent, "test-project", "test-agent", config_path)
+        config_path.write_text("verbose: false\n")
+        second = enable_evaluation(mock_agent, "test-project", "test-agent", config_path)
+
+        # Assert
+        assert second is not first
+        assert first.config.verbose is True
+        assert second.config.verbose is False
+
+
+class TestExtractMethods:
+    """Tests for output and metadata extraction methods."""
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_extract_output_string(self, mock_dataset, mock_metrics, mock_tracer, mock_logger):
+        """Test extracting output from string response."""
+        # Arrange
+        mock_agent = Mock()
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+
+        # Act
+        output = wrapper._extract_output("test response")
+
+        # Assert
+        assert output == "test response"
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_extract_metadata_string(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that string responses share the empty metadata without probing."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=Mock(), config=config)
+
+        # Act
+        first = wrapper._extract_metadata("one")
+        second = wrapper._extract_metadata("two")
+
+        # Assert
+        assert first == {} and first is second
+        assert wrapper._extract_token_usage("one") == (None, None)
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_extract_output_with_text_attribute(
+        self, mock_dataset, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test extracting output from response with .text attribute."""
+        # Arrange
+        mock_agent = Mock()
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+
+        mock_response = Mock()
+        mock_response.text = "test response"
+
+        # Act
+        output = wrapper._extract_output(mock_response)
+
+        # Assert
+        assert output == "test response"
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_extract_metadata_from_probed_attributes(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that probed responses merge usage fields with direct fields and dict metadata."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=Mock(), config=config)
+        response = SimpleNamespace(
+            usage_metadata=SimpleNamespace(prompt_token_count=3, candidates_token_count=4),
+            candidates_token_count=None,
+            model="gemini",
+        )
+
+        # Act
+        metadata = wrapper._extract_metadata(response)
+        dict_metadata = wrapper._extract_metadata(
+            {"output": "hi", "metadata": {"input_tokens": 1}, "model": "gemini"}
+        )
+
+        # Assert
+        assert metadata == {"input_tokens": 3, "model": "gemini"}
+        assert dict_metadata == {"input_tokens": 1, "model": "gemini"}
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_extract_output_from_event_content(self, mock_metrics, mock_tracer, mock_logger):
+        """Test that plain event objects are probed for content.parts text."""
+        # Arrange
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=Mock(), config=config)
+        event = SimpleNamespace(
+            content=SimpleNamespace(
+                parts=[SimpleNamespace(text="hello"), SimpleNamespace(text=None)]
+            )
+        )
+
+        # Act
+        output = wrapper._extract_output(event)
+
+        # Assert
+        assert output == "hello"
+        assert wrapper._extract_output(SimpleNamespace(text=None)) is None
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_extractors_cached_per_response_type(
+        self, mock_dataset, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test genai responses reuse one extractor per type."""
+        # Arrange
+        types = pytest.importorskip("google.genai.types")
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=Mock(), config=config)
+
+        def make_response(text, tokens):
+            return types.GenerateContentResponse(
+                candidates=[
+                    types.Candidate(
+                        content=types.Content(role="model", parts=[types.Part(text=text)])
+                    )
+                ],
+                usage_metadata=types.GenerateContentResponseUsageMetadata(
+                    prompt_token_count=tokens, total_token_count=tokens
+                ),
+            )
+
+        # Act
+        first = wrapper._extract_output(make_response("first", 3))
+        second = wrapper._extract_output(make_response("second", 5))
+        metadata = wrapper._extract_metadata(make_response("third", 7))
+        tokens = wrapper._extract_token_usage(make_response("fourth", 9))
+
+        # Assert
+        assert (first, second) == ("first", "second")
+        assert metadata == {"input_tokens": 7, "total_tokens": 7}
+        assert tokens == (9, None)
+        assert list(wrapper._output_extractor_cache) == [types.GenerateContentResponse]
+        assert list(wrapper._token_usage_extractor_cache) == [types.GenerateContentResponse]
+
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_extract_output_skips_parts_without_text(
+        self, mock_dataset, mock_metrics, mock_tracer, mock_logger
+    ):
+        """Test that function-call parts (text=None) are skipped when joining part text."""
+        # Arrange
+        mock_agent = Mock()
+        config = EvaluationConfig.default("test-project", "test-agent")
+        wrapper = EvaluationWrapper(agent=mock_agent, config=config)
+
+        candidate = Mock()
+        candidate.content.parts = [Mock(text="Looking that up"), Mock(text=None)]
+        response = Mock(spec=["candidates"])
+        response.candidates = [candidate]
+
+        # Act
+        output = wrapper._extract_output(response)
+
+        # Assert
+        assert output == "Looking that up"
+
+
+class TestInteractionIds:
+    """Tests for pooled interaction id generation."""
+
+    def test_next_id_yields_unique_uuid4_hex(self):
+        """Test that pooled ids are valid, distinct uuid4 hex strings across refills."""
+        import uuid
+
+        from agent_evaluation_sdk.ids import next_id
+
+        # Act
+        ids = [next_id() for _ in range(1000)]
+
+        # Assert
+        assert len(set(ids)) == len(ids)
+        for value in ids[:300]:
+            parsed = uuid.UUID(hex=value)
+            assert parsed.hex == value
+            assert parsed.version == 4
+            assert parsed.variant == uuid.RFC_4122
+
+
+class TestSemanticCache:
+    """Tests for the semantic response cache."""
+
+    def test_similar_prompt_hits_cache(self):
+        """Test that a near-duplicate prompt reuses the cached response."""
+        np = pytest.importorskip("numpy")
+        from agent_evaluation_sdk.cache import SemanticCache
+
+        vectors = {
+            "Tell me about X": np.array([1.0, 0.0]),
+            "Talk to me about X": np.array([0.99, 0.05]),
+            "Something else": np.array([0.0, 1.0]),
+        }
+        cache = SemanticCache(threshold=0.92, max_entries=2, embed_fn=vectors.__getitem__)
+
+        _, vector = cache.lookup("Tell me about X")
+        cache.add(vector, "answer")
+
+        assert cache.lookup("Talk to me about X")[0] == "answer"
+        assert cache.lookup("Something else")[0] is None
+        assert cache.lookup("Talk to me about X", namespace="other-agent")[0] is None
+
+    def test_embedding_model_loaded_once_by_racing_calls(self):
+        """Test that concurrent first embeddings share a single model load."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from agent_evaluation_sdk.cache import _lazy_encoder
+
+        # Arrange
+        model_cls = Mock()
+        model_cls.return_value.encode.side_effect = len
+        embed = _lazy_encoder(model_cls, "test-model")
+
+        # Act
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            vectors = list(executor.map(embed, ["a", "bb"] * 8))
+
+        # Assert
+        model_cls.assert_called_once_with("test-model")
+        assert vectors == [1, 2] * 8
+
+    @patch("agent_evaluation_sdk.core.SemanticCache")
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    @patch("agent_evaluation_sdk.core.DatasetCollector")
+    def test_cache_hit_skips_agent_call(
+        self, mock_dataset, mock_metrics, mock_tracer, mock_logger, mock_cache_class
+    ):
+        """Test that generate_content is not called on a cache hit."""
+        # Arrange
+        mock_agent = Mock()
+        original_generate = Mock(return_value="fresh response")
+        mock_agent.generate_content = original_generate
+        mock_cache_class.return_value.lookup.return_value = ("cached response", None)
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.cache.enabled = True
+
+        # Act
+        EvaluationWrapper(agent=mock_agent, config=config)
+        result = mock_agent.generate_content("Tell me about X")
+
+        # Assert
+        assert result == "cached response"
+        original_generate.assert_not_called()
+
+    @patch("agent_evaluation_sdk.core.SemanticCache")
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_async_generate_content_uses_cache(
+        self, mock_metrics, mock_tracer, mock_logger, mock_cache_class
+    ):
+        """Test that coroutine generate_content is awaited and cached."""
+        import asyncio
+
+        # Arrange
+        calls = []
+
+        class AsyncAgent:
+            async def generate_content(self, prompt):
+                calls.append(prompt)
+                return f"answer to {prompt}"
+
+        agent = AsyncAgent()
+        mock_cache = mock_cache_class.return_value
+        mock_cache.lookup.side_effect = [(None, "vec"), ("cached response", "vec")]
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.cache.enabled = True
+        EvaluationWrapper(agent=agent, config=config)
+
+        # Act
+        first = asyncio.run(agent.generate_content("Tell me about X"))
+        second = asyncio.run(agent.generate_content("Tell me about X?"))
+
+        # Assert
+        assert (first, second) == ("answer to Tell me about X", "cached response")
+        assert calls == ["Tell me about X"]
+        mock_cache.add.assert_called_once_with("vec", first, None)
+
+    @patch("agent_evaluation_sdk.core.SemanticCache")
+    @patch("agent_evaluation_sdk.core.CloudLogger")
+    @patch("agent_evaluation_sdk.core.CloudTracer")
+    @patch("agent_evaluation_sdk.core.CloudMetrics")
+    def test_cache_failure_falls_through_to_agent(
+        self, mock_metrics, mock_tracer, mock_logger, mock_cache_class
+    ):
+        """Test that a failing cache lookup or add never fails the agent call."""
+        # Arrange
+        mock_agent = Mock()
+        original_generate = Mock(return_value="fresh response")
+        mock_agent.generate_content = original_generate
+        mock_cache = mock_cache_class.return_value
+        mock_cache.lookup.side_effect = [RuntimeError("embedding failed"), (None, "vec")]
+        mock_cache.add.side_effect = RuntimeError("add failed")
+        config = EvaluationConfig.default("test-project", "test-agent")
+        config.cache.enabled = True
+        EvaluationWrapper(agent=mock_agent, config=config)
+
+        # Act
+        first = mock_agent.generate_content("Tell me about X")
+        second = mock_agent.generate_content("Tell me about Y")
+
+        # Assert
+        assert (first, second) == ("fresh response", "fresh response")
+        assert original_generate.call_count == 2
+
+
+class TestCloudTracer:
+    """Tests for batched span export."""
+
+    @patch("agent_evaluation_sdk.tracing.TraceServiceClient")
+    def test_spans_exported_in_one_batch(self, mock_client_class):
+        """Test that queued spans are written together on flush."""
+        from agent_evaluation_sdk.tracing import CloudTracer
+
+        # Arrange
+        tracer = CloudTracer("test-project", "test-agent", schedule_delay=60)
+        trace_id = tracer.generate_trace_id()
+
+        # Act
+        attributes = {"query": "hi"}
+        for i in range(3):
+            tracer._send_span(trace_id, f"{i:016x}", "span", 0.0, 1.0, attributes)
+        tracer.flush()
+        tracer.shutdown()
+
+        # Assert
+        mock_client = mock_client_class.return_value
+        mock_client.create_span.assert_not_called()
+        mock_client.batch_write_spans.assert_called_once()
+        spans = mock_client.batch_write_spans.call_args.kwargs["spans"]
+        assert len(spans) == 3
+        assert set(spans[0].attributes.attribute_map) == {"query", "agent_name"}
+        assert attributes == {"query": "hi"}
+
+    @patch("agent_evaluation_sdk.tracing.TraceServiceClient")
+    def test_grouped_spans_share_one_queue_entry(self, mock_client_class):
+        """Test that _send_spans queues one entry and exports every span in it."""
+        from agent_evaluation_sdk.tracing import CloudTracer
+
+        # Arrange
+        tracer = CloudTracer("test-project", "test-agent", schedule_delay=60)
+        trace_id = tracer.generate_trace_id()
+
+        # Act
+        tracer._send_spans([(trace_id, f"{i:016x}", "span", 0.0, 1.0, {}, None) for i in range(3)])
+        queued = tracer._queue.qsize()
+        tracer.shutdown()
+
+        # Assert
+        spans = mock_client_class.return_value.batch_write_spans.call_args.kwargs["spans"]
+        assert queued == 1
+        assert [span.span_id for span in spans] == [f"{i:016x}" for i in range(3)]
+
+    @patch("agent_evaluation_sdk.tracing.TraceServiceClient")
+    def test_flush_bounded_when_queue_full(self, mock_client_class):
+        """Test that flush returns within its timeout when a slow export has filled the queue."""
+        import threading
+        import time
+
+        from agent_evaluation_sdk.tracing import CloudTracer
+
+        # Arrange
+        exporting, release = threading.Event(), threading.Event()
+
+        def slow_export(name, spans):
+            exporting.set()
+            release.wait(5)
+
+        mock_client_class.return_value.batch_write_spans.side_effect = slow_export
+        tracer = CloudTracer("test-project", "test-agent", max_queue_size=1, schedule_delay=0)
+        trace_id = tracer.generate_trace_id()
+        tracer._send_span(trace_id, "0" * 16, "span", 0.0, 1.0, {})
+        exporting.wait(5)
+        tracer._send_span(trace_id, "1" * 16, "span", 0.0, 1.0, {})
+
+        # Act
+        start = time.monotonic()
+        tracer.flush(timeout=0.2)
+        elapsed = time.monotonic() - start
+        release.set()
+        tracer.shutdown()
+
+        # Assert
+        assert elapsed < 1.0
+
+
+class TestDatasetCollector:
+    """Tests for background dataset uploads."""
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_full_buffer_uploaded_without_blocking(self, mock_bigquery):
+        """Test that a full buffer is swapped out and loaded off the calling thread."""
+        import threading
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        started, release = threading.Event(), threading.Event()
+        mock_client = mock_bigquery.Client.return_value
+
+        def slow_result(timeout):
+            started.set()
+            release.wait(timeout)
+
+        mock_client.load_table_from_file.return_value.result.side_effect = slow_result
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=2)
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+        collector.add_interaction("2", "q2", "a2")
+        started.wait(5)
+        collector.add_interaction("3", "q3", "a3")
+        buffered = [entry["interaction_id"] for entry in collector.buffer]
+        release.set()
+        collector.flush()
+
+        # Assert
+        assert buffered == ["3"]
+        assert mock_client.load_table_from_file.call_count == 2
+        assert collector.buffer == []
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_batches_queued_during_upload_share_one_load_job(self, mock_bigquery):
+        """Test that full buffers waiting on a slow load job are merged into the next one."""
+        import threading
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        started, release = threading.Event(), threading.Event()
+        mock_client = mock_bigquery.Client.return_value
+
+        def slow_result(timeout):
+            started.set()
+            release.wait(timeout)
+
+        mock_client.load_table_from_file.return_value.result.side_effect = slow_result
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=1)
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+        started.wait(5)
+        for i in range(2, 5):
+            collector.add_interaction(str(i), f"q{i}", f"a{i}")
+        release.set()
+        collector.flush()
+
+        # Assert
+        assert mock_client.load_table_from_file.call_count == 2
+
+    @patch("agent_evaluation_sdk.dataset._MAX_BATCH_ROWS", 2)
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_merged_load_jobs_capped_at_row_limit(self, mock_bigquery):
+        """Test that merging stops at the per-job row cap and leaves later batches queued."""
+        import threading
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        started, release = threading.Event(), threading.Event()
+        mock_client = mock_bigquery.Client.return_value
+        rows_per_job = []
+
+        def load(source_file, destination, job_config):
+            rows_per_job.append(source_file.getvalue().count(b"\n"))
+            return mock_client.load_table_from_file.return_value
+
+        def slow_result(timeout):
+            started.set()
+            release.wait(timeout)
+
+        mock_client.load_table_from_file.side_effect = load
+        mock_client.load_table_from_file.return_value.result.side_effect = slow_result
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=1)
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+        started.wait(5)
+        for i in range(2, 5):
+            collector.add_interaction(str(i), f"q{i}", f"a{i}")
+        release.set()
+        collector.flush()
+
+        # Assert
+        assert rows_per_job == [1, 2, 1]
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_shutdown_writes_buffer_and_stops_uploader(self, mock_bigquery):
+        """Test that shutdown writes the partial buffer and ends the uploader thread."""
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        mock_client = mock_bigquery.Client.return_value
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=100)
+        collector.add_interaction("1", "q1", "a1")
+
+        # Act
+        collector.shutdown(timeout=5)
+
+        # Assert
+        assert not collector._upload_thread.is_alive()
+        assert mock_client.load_table_from_file.call_count == 1
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_partial_buffer_written_after_flush_interval(self, mock_bigquery):
+        """Test that entries below buffer_size are written once the uploader sits idle."""
+        import threading
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        loaded = threading.Event()
+        mock_client = mock_bigquery.Client.return_value
+        mock_client.load_table_from_file.return_value.errors = None
+        mock_client.load_table_from_file.return_value.result.side_effect = (
+            lambda timeout: loaded.set()
+        )
+        collector = DatasetCollector(
+            "test-project", "test-agent", buffer_size=100, flush_interval=0.01
+        )
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+
+        # Assert
+        assert loaded.wait(5)
+        assert collector.buffer == []
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_non_positive_flush_interval_disables_idle_write(self, mock_bigquery):
+        """Test that flush_interval=0 leaves partial buffers for flush() instead of spinning."""
+        import time
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        mock_client = mock_bigquery.Client.return_value
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector(
+            "test-project", "test-agent", buffer_size=100, flush_interval=0
+        )
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+        time.sleep(0.05)
+        buffered = len(collector.buffer)
+        collector.flush()
+
+        # Assert
+        assert collector.flush_interval is None
+        assert buffered == 1
+        assert mock_client.load_table_from_file.call_count == 1
+
+    @patch("agent_evaluation_sdk.dataset._MAX_PENDING_BATCHES", 1)
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_batches_dropped_when_uploads_back_up(self, mock_bigquery):
+        """Test that add_interaction drops full buffers rather than queueing without bound."""
+        import threading
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        started, release = threading.Event(), threading.Event()
+        mock_client = mock_bigquery.Client.return_value
+
+        def slow_result(timeout):
+            started.set()
+            release.wait(timeout)
+
+        mock_client.load_table_from_file.return_value.result.side_effect = slow_result
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=1)
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+        started.wait(5)
+        for i in range(2, 5):
+            collector.add_interaction(str(i), f"q{i}", f"a{i}")
+        dropped = collector.dropped_entries
+        release.set()
+        collector.flush()
+
+        # Assert
+        assert dropped == 2
+        assert mock_client.load_table_from_file.call_count == 2
+
+    @patch("agent_evaluation_sdk.dataset._MAX_PENDING_BATCHES", 1)
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_flush_keeps_buffer_when_uploads_back_up(self, mock_bigquery):
+        """Test that a timed-out flush returns on time and keeps its entries buffered."""
+        import threading
+        import time
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        started, release = threading.Event(), threading.Event()
+        mock_client = mock_bigquery.Client.return_value
+
+        def slow_result(timeout):
+            started.set()
+            release.wait(timeout)
+
+        mock_client.load_table_from_file.return_value.result.side_effect = slow_result
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=1)
+        collector.add_interaction("1", "q1", "a1")
+        started.wait(5)
+        collector.add_interaction("2", "q2", "a2")  # Fills the pending-batch queue
+        collector.buffer_size = collector._max_rows = 10
+        collector.add_interaction("3", "q3", "a3")
+
+        # Act
+        start = time.monotonic()
+        collector.flush(timeout=0.2)
+        elapsed = time.monotonic() - start
+        buffered = [entry["interaction_id"] for entry in collector.buffer]
+        release.set()
+        collector.flush()
+
+        # Assert
+        assert elapsed < 1.0
+        assert buffered == ["3"]
+        assert collector.dropped_entries == 0
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_buffer_uploaded_when_byte_threshold_reached(self, mock_bigquery):
+        """Test that large interactions trigger an upload before buffer_size is reached."""
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        mock_client = mock_bigquery.Client.return_value
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=100, buffer_bytes=10)
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+        collector.add_interaction("2", "question", "answer")
+        buffered = list(collector.buffer)
+        collector.flush()
+
+        # Assert
+        assert buffered == []
+        assert mock_client.load_table_from_file.call_count == 1
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_buffer_sized_by_bytes_when_buffer_size_none(self, mock_bigquery):
+        """Test that buffer_size=None leaves batching to buffer_bytes and the row cap."""
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        mock_client = mock_bigquery.Client.return_value
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=None)
+
+        # Act
+        with patch.object(collector, "_max_rows", 3):
+            for i in range(3):
+                collector.add_interaction(str(i), f"q{i}", f"a{i}")
+            buffered = list(collector.buffer)
+        for i in range(3, 20):
+            collector.add_interaction(str(i), f"q{i}", f"a{i}")
+        pending = len(collector.buffer)
+        collector.flush()
+
+        # Assert
+        assert buffered == []
+        assert pending == 17
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_zero_buffer_size_writes_every_entry(self, mock_bigquery):
+        """Test that buffer_size=0 still hands each entry to the uploader immediately."""
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        mock_bigquery.Client.return_value.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=0)
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+        buffered = len(collector.buffer)
+        collector.flush()
+
+        # Assert
+        assert buffered == 0
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_table_checked_once_until_a_write_finds_it_missing(self, mock_bigquery):
+        """Test that batches skip the table metadata lookups unless the table went missing."""
+        from google.cloud.exceptions import NotFound
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        mock_client = mock_bigquery.Client.return_value
+        load_job = mock_client.load_table_from_file.return_value
+        load_job.errors = None
+        collector = DatasetCollector("test-project", "test-agent", buffer_size=1)
+
+        # Act
+        collector.add_interaction("1", "q1", "a1")
+        collector.add_interaction("2", "q2", "a2")
+        collector.flush()
+        lookups_after_success = mock_client.get_table.call_count
+        load_job.result.side_effect = [TimeoutError("slow"), None]
+        collector.add_interaction("3", "q3", "a3")
+        collector.flush()
+        collector.flush()
+        lookups_after_timeout = mock_client.get_table.call_count
+        load_job.result.side_effect = [NotFound("table deleted"), None]
+        collector.add_interaction("4", "q4", "a4")
+        collector.flush()
+        collector.flush()
+
+        # Assert
+        assert lookups_after_success == 1
+        assert lookups_after_timeout == 1
+        assert mock_client.get_table.call_count == 2
+        assert collector.buffer == []
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_batch_uploaded_as_in_memory_jsonl(self, mock_bigquery):
+        """Test that a batch is loaded from an in-memory newline-delimited JSON buffer."""
+        import json
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        mock_client = mock_bigquery.Client.return_value
+        mock_client.load_table_from_file.return_value.errors = None
+        collector = DatasetCollector("test-project", "test-agent")
+
+        # Act
+        collector.add_interaction("1", "q1", "a1", metadata={"model": "gemini"})
+        collector.add_interaction("2", {"q": "é"}, "a2")
+        collector.flush()
+
+        # Assert
+        source_file = mock_client.load_table_from_file.call_args.args[0]
+        rows = [json.loads(line) for line in source_file.getvalue().decode().splitlines()]
+        assert [row["interaction_id"] for row in rows] == ["1", "2"]
+        assert rows[0]["metadata"] == {"model": "gemini"}
+        assert rows[1]["instruction"] == '{"q":"é"}'
+
+    def test_ndjson_same_with_and_without_orjson(self):
+        """Test that orjson's bytes match the stdlib fallback's newline-delimited output."""
+        pytest.importorskip("orjson")
+        from agent_evaluation_sdk import dataset
+
+        # Arrange
+        entries = [{"instruction": "q1", "metadata": {"model": "gemini"}}, {"instruction": "é"}]
+
+        # Act
+        fast = dataset._ndjson(entries)
+        with patch.object(dataset, "orjson", None):
+            fallback = dataset._ndjson(entries)
+
+        # Assert
+        assert fast == fallback
+        assert fast.count(b"\n") == 2
+
+    @patch("agent_evaluation_sdk.dataset.bigquery")
+    def test_serialize_compact_json(self, mock_bigquery):
+        """Test that structured inputs are stored as compact JSON, with str() as fallback."""
+        from datetime import date
+
+        from agent_evaluation_sdk.dataset import DatasetCollector
+
+        # Arrange
+        collector = DatasetCollector("test-project", "test-agent")
+
+        # Act
+        serialized = collector._serialize({"q": "café", "on": date(2024, 1, 2), "n": [1, 2]})
+
+        # Assert
+        assert serialized == '{"q":"café","on":"2024-01-02","n":[1,2]}'
+        assert collector._serialize("plain") == "plain"
+
+    def test_dumps_same_with_and_without_orjson(self):
+        """Test that datetimes, dataclasses and NaN encode the same on both JSON paths."""
+        from dataclasses import dataclass
+        from datetime import datetime
+
+        from agent_evaluation_sdk import dataset
+
+        @dataclass
+        class Point:
+            x: int
+
+        data = {"at": datetime(2024, 1, 1), "score": float("nan"), "point": Point(1)}
+        expected = '{"at":"2024-01-01 00:00:00","score":null,"point":"' + str(Point(1)) + '"}'
+
+        for orjson in {dataset.orjson, None}:
+            with patch.object(dataset, "orjson", orjson):
+                assert dataset._dumps(data) == expected
+                assert dataset._ndjson([data]) == (expected + "\n").encode()
+
+
+class TestCloudMetrics:
+    """Tests for metric write throttling."""
+
+    @patch("agent_evaluation_sdk.metrics.monitoring_v3.MetricServiceClient")
+    def test_repeat_writes_throttled_per_label_set(self, mock_client_class):
+        """Test that a metric is written once per interval for each distinct label set."""
+        from agent_evaluation_sdk.metrics import CloudMetrics
+
+        # Arrange
+        metrics = CloudMetrics("test-project", "test-agent")
+
+        # Act
+        for _ in range(3):
+            metrics.record_success()
+            metrics.record_error("ValueError")
+        metrics.record_error("TimeoutError")
+
+        # Assert
+        mock_client = mock_client_class.return_value
+        assert mock_client.create_time_series.call_count == 3
+        series = mock_client.create_time_series.call_args.kwargs["time_series"][0]
+        assert dict(series.metric.labels) == {
+            "error_type": "TimeoutError",
+            "agent_name": "test-agent",
+        }
+
+    @patch("agent_evaluation_sdk.metrics.time.time")
+    @patch("agent_evaluation_sdk.metrics.monitoring_v3.MetricServiceClient")
+    def test_throttled_values_coalesced_into_next_write(self, mock_client_class, mock_time):
+        """Test that values recorded between writes are summed or averaged, not dropped."""
+        from agent_evaluation_sdk.metrics import CloudMetrics
+
+        # Arrange
+        metrics = CloudMetrics("test-project", "test-agent")
+        mock_time.return_value = 1000.0
+
+        # Act
+        for duration_ms in (10.0, 20.0, 30.0):
+            metrics.record_success()
+            metrics.record_latency(duration_ms)
+        mock_time.return_value = 1061.0
+        metrics.record_success()
+        metrics.record_latency(60.0)
+
+        # Assert
+        calls = mock_client_class.return_value.create_time_series.call_args_list
+        points = [call.kwargs["time_series"][0].points[0].value for call in calls]
+        assert [point.int64_value for point in points[::2]] == [1, 3]
+        assert [point.double_value for point in points[1::2]] == [10.0, 110.0 / 3]
+
+
+class TestDiagnostics:
+    """Tests for rate-limited SDK warnings."""
+
+    def test_repeated_warnings_rate_limited_per_template(self):
+        """Test that a flood of one warning is capped without silencing other warnings."""
+        import logging
+
+        from agent_evaluation_sdk.diagnostics import _RateLimitFilter
+
+        # Arrange
+        limiter = _RateLimitFilter(rate=0.001, burst=3)
+
+        def record(msg, *args):
+            return logging.LogRecord("sdk", logging.WARNING, __file__, 0, msg, args, None)
+
+        # Act
+        flood = [
+            limiter.filter(record("Failed to export %d spans: %s", i, "boom")) for i in range(10)
+        ]
+        other = limiter.filter(record("Failed to write metric: %s", "boom"))
+
+        # Assert
+        assert flood == [True] * 3 + [False] * 7
+        assert other is True
+
+
+class TestRateLimiter:
+    """Tests for the token bucket rate limiter."""
+
+    @patch("agent_evaluation_sdk.rate_limit.time")
+    def test_blocks_only_when_bucket_empty(self, mock_time):
+        """Test that bursts within capacity don't sleep and the next call waits."""
+        from agent_evaluation_sdk.rate_limit import RateLimiter
+
+        # Arrange - clock only advances when the limiter sleeps
+        clock = [0.0]
+        mock_time.monotonic.side_effect = lambda: clock[0]
+        mock_time.sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        limiter = RateLimiter(rpm=60, burst=2)
+
+        # Act / Assert
+        limiter.acquire()
+        limiter.acquire()
+        mock_time.sleep.assert_not_called()
+
+        limiter.acquire()
+        mock_time.sleep.assert_called_once_with(1.0)
 
 
 if __name__ == "__main__":
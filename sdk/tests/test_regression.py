@@ -0,0 +1,178 @@
+"""
+Unit tests for regression testing.
+"""
+
+import asyncio
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from agent_evaluation_sdk.regression import RegressionTester
+
+
+class TestRegressionTester:
+    """Tests for RegressionTester class."""
+
+    @patch("agent_evaluation_sdk.regression.bigquery.Client")
+    def test_concurrent_run_keeps_order_and_trajectories(self, mock_bq_client):
+        """Test that concurrent test runs keep input order and per-case trajectories."""
+        # Arrange
+        barrier = threading.Barrier(3)
+        local = threading.local()
+
+        def generate_content(prompt):
+            local.last = [{"tool_name": prompt}]
+            barrier.wait(timeout=5)  # Only passes if all three run at once
+            return Mock(text=f"answer to {prompt}")
+
+        wrapper = Mock()
+        wrapper.get_last_trajectory.side_effect = lambda: local.last
+        agent = Mock(generate_content=generate_content, _evaluation_wrapper=wrapper)
+        tester = RegressionTester(project_id="test-project", agent_name="test-agent")
+        test_cases = [{"instruction": q} for q in ("a", "b", "c")]
+
+        # Act
+        results = asyncio.run(tester.arun_agent_on_tests(agent, test_cases, max_concurrency=3))
+
+        # Assert
+        assert [r["response"] for r in results] == ["answer to a", "answer to b", "answer to c"]
+        assert [r["trajectory"][0]["tool_name"] for r in results] == ["a", "b", "c"]
+        assert all(r["error"] is None for r in results)
+
+    @patch("agent_evaluation_sdk.regression.bigquery.Client")
+    def test_run_full_test_works_inside_running_loop(self, mock_bq_client):
+        """Test that run_full_test can be called where an event loop is already running."""
+        # Arrange
+        tester = RegressionTester(project_id="test-project", agent_name="test-agent")
+        tester.prewarm = Mock()
+        tester.fetch_test_cases = Mock(return_value=[])
+
+        async def notebook_cell():
+            return tester.run_full_test(Mock(), "run-1")
+
+        # Act
+        result = asyncio.run(notebook_cell())
+
+        # Assert
+        assert result == {"error": "No test cases found"}
+
+    @patch("agent_evaluation_sdk.regression.bigquery.Client")
+    def test_early_return_collects_prewarm_task(self, mock_bq_client):
+        """Test that a failed prewarm is collected when the run stops before evaluating."""
+        # Arrange
+        import gc
+
+        prewarmed = threading.Event()
+
+        def prewarm():
+            prewarmed.set()
+            raise ImportError("vertexai missing")
+
+        tester = RegressionTester(project_id="test-project", agent_name="test-agent")
+        tester.prewarm = prewarm
+        tester.fetch_test_cases = Mock(side_effect=lambda **kwargs: prewarmed.wait(5) and [])
+        unretrieved = []
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            loop.set_exception_handler(lambda loop, context: unretrieved.append(context))
+            result = await tester.arun_full_test(Mock(), "run-1")
+            await asyncio.sleep(0.05)  # Let the prewarm task finish if it was left running
+            gc.collect()  # An unretrieved task exception is reported when the task is freed
+            return result
+
+        # Act
+        result = asyncio.run(main())
+
+        # Assert
+        assert result == {"error": "No test cases found"}
+        assert unretrieved == []
+
+    @patch("agent_evaluation_sdk.regression._ARROW_DOWNLOAD", True)
+    @patch("agent_evaluation_sdk.regression.bigquery.Client")
+    def test_fetch_test_cases_downloads_arrow_batches(self, mock_bq_client):
+        """Test that test cases are read as Arrow when the Storage Read API is installed."""
+        # Arrange
+        results = mock_bq_client.return_value.query.return_value.result.return_value
+        results.to_arrow.return_value.to_pylist.return_value = [
+            {"instruction": "q", "reference": "a", "reference_trajectory": '[{"tool_name":"t"}]'},
+            {"instruction": "q2", "reference": "a2", "reference_trajectory": None},
+        ]
+        tester = RegressionTester(project_id="test-project", agent_name="test-agent")
+
+        # Act
+        test_cases = tester.fetch_test_cases()
+
+        # Assert
+        results.to_arrow.assert_called_once_with(create_bqstorage_client=True)
+        assert test_cases[0]["reference_trajectory"] == [{"tool_name": "t"}]
+        assert test_cases[1]["reference_trajectory"] is None
+
+    @patch("agent_evaluation_sdk.regression._ARROW_DOWNLOAD", True)
+    @patch("agent_evaluation_sdk.regression.bigquery.Client")
+    def test_fetch_test_cases_falls_back_to_rest_when_arrow_fails(self, mock_bq_client):
+        """Test that a Storage Read API failure still returns the rows over REST."""
+        # Arrange
+        rows = [{"instruction": "q", "reference": "a"}]
+        results = Mock()
+        results.to_arrow.side_effect = RuntimeError("readsessions.create denied")
+        query_job = mock_bq_client.return_value.query.return_value
+        query_job.result.side_effect = [results, iter(rows)]
+        tester = RegressionTester(project_id="test-project", agent_name="test-agent")
+
+        # Act
+        test_cases = tester.fetch_test_cases()
+
+        # Assert
+        assert test_cases == rows
+
+    @patch("agent_evaluation_sdk.regression.bigquery.Client")
+    def test_iter_test_cases_raises_when_stream_is_cut_short(self, mock_bq_client):
+        """Test that a failure after the first page is raised rather than ending the stream."""
+
+        # Arrange
+        def pages():
+            yield [{"instruction": "q1"}]
+            raise RuntimeError("connection reset")
+
+        results = mock_bq_client.return_value.query.return_value.result.return_value
+        results.pages = pages()
+        tester = RegressionTester(project_id="test-project", agent_name="test-agent")
+        test_cases = tester.iter_test_cases()
+
+        # Act
+        first = next(test_cases)
+
+        # Assert
+        assert first == {"instruction": "q1"}
+        with pytest.raises(RuntimeError, match="connection reset"):
+            next(test_cases)
+
+    @patch("agent_evaluation_sdk.regression.bigquery.Client")
+    def test_iter_test_cases_prefetches_next_page(self, mock_bq_client):
+        """Test that the next page downloads while the caller works on the current one."""
+        # Arrange
+        second_requested = threading.Event()
+
+        def pages():
+            yield [{"instruction": "q1"}]
+            second_requested.set()
+            yield [{"instruction": "q2"}]
+
+        results = mock_bq_client.return_value.query.return_value.result.return_value
+        results.pages = pages()
+        tester = RegressionTester(project_id="test-project", agent_name="test-agent")
+        test_cases = tester.iter_test_cases()
+
+        # Act
+        first = next(test_cases)
+
+        # Assert
+        assert first == {"instruction": "q1"}
+        assert second_requested.wait(timeout=5)
+        assert list(test_cases) == [{"instruction": "q2"}]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])